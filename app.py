@@ -1,12 +1,16 @@
 import streamlit as st
 from frontend.pages import add_record, search_records, last_records
 from backend.auth import check_password
+from backend import write_queue
 
 st.set_page_config(page_title="💰 KuberX", layout="wide")
 
 if not check_password():
     st.stop()
 
+# Upload any records still queued from a previous run
+write_queue.start()
+
 st.sidebar.success(f"👤 Logged in as: **{st.session_state['logged_in_user']}**")
 
 if st.sidebar.button("🚪 Logout"):
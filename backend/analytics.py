@@ -3,37 +3,86 @@ Loan Management System - Analytics & Metrics Module
 Provides business insights and growth metrics with enhanced trend analysis
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from collections import defaultdict
 import calendar
+import numpy as np
+from backend.record_store import (
+    as_store, STATUS_ACTIVE, STATUS_COLUMN
+)
 
-def parse_date(date_str):
-    """Parse dae string to datetime object"""
-    try:
-        return datetime.strptime(date_str, '%Y-%m-%d')
-    except:
-        try:
-            return datetime.strptime(date_str, '%d/%m/%Y')
-        except:
-            return None
-
-def parse_amount(amount_str):
-    """Convert amount string to float"""
-    try:
-        return float(str(amount_str).replace(',', '').strip())
-    except:
-        return 0.0
+# All functions accept either the raw rows (including header) or a RecordStore;
+# rows are converted once and the parsed columns are shared between them.
 
 def get_quarter(dt):
     """Get quarter from datetime object"""
     return f"Q{(dt.month - 1) // 3 + 1} {dt.year}"
 
+def _numbers(values):
+    """Parsed column with unparseable cells counted as 0 (same as parse_amount)"""
+    return np.where(np.isnan(values), 0.0, values)
+
+def _is_active(store):
+    """A row without a loanStatus cell counts as Active"""
+    return (store.status == STATUS_ACTIVE) | (store.row_width <= STATUS_COLUMN)
+
+def _dated(store, min_width=11):
+    return (store.row_width >= min_width) & (store.year > 0)
+
+def _yearly_totals(store):
+    """Per year (as a string): total and active loan counts and amounts, unrounded"""
+    yearly_data = defaultdict(lambda: {'total_count': 0, 'total_amount': 0.0, 'active_count': 0, 'active_amount': 0.0})
+    
+    dated = _dated(store)
+    years = store.year[dated]
+    if len(years):
+        amount = _numbers(store.amount)[dated]
+        active = _is_active(store)[dated]
+        
+        values, inverse = np.unique(years, return_inverse=True)
+        total_counts = np.bincount(inverse)
+        total_amounts = np.bincount(inverse, weights=amount)
+        active_counts = np.bincount(inverse, weights=active)
+        active_amounts = np.bincount(inverse, weights=amount * active)
+        
+        for j, year in enumerate(values):
+            data = yearly_data[str(year)]
+            data['total_count'] = int(total_counts[j])
+            data['total_amount'] = float(total_amounts[j])
+            data['active_count'] = int(active_counts[j])
+            data['active_amount'] = float(active_amounts[j])
+    
+    return yearly_data
+
+def _group_by_text(store, name, mask, amount, active):
+    """
+    Per distinct non-blank value of a text column, in first-seen order
+    Returns: list of (value, count, amount, active count)
+    """
+    labels, codes = store.categories(name)
+    codes = codes[mask]
+    if not len(codes):
+        return []
+    
+    counts = np.bincount(codes, minlength=len(labels))
+    amounts = np.bincount(codes, weights=amount[mask], minlength=len(labels))
+    actives = np.bincount(codes, weights=active[mask], minlength=len(labels))
+    
+    present, first_seen = np.unique(codes, return_index=True)
+    order = present[np.argsort(first_seen, kind='stable')]
+    
+    return [
+        (labels[code], int(counts[code]), float(amounts[code]), int(actives[code]))
+        for code in order if labels[code].strip()
+    ]
+
 def calculate_basic_metrics(records):
     """
     Calculate basic loan metrics
     Returns: dict with key metrics
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return {
             'total_loans': 0,
             'active_loans': 0,
@@ -44,29 +93,19 @@ def calculate_basic_metrics(records):
             'total_interest_expected': 0
         }
     
-    total_loans = len(records) - 1  # Exclude header
-    active_loans = 0
-    closed_loans = 0
-    total_amount = 0.0
-    active_amount = 0.0
-    total_interest = 0.0
+    total_loans = store.size  # Header is not part of the store
     
-    for row in records[1:]:  # Skip header
-        if len(row) < 15:
-            continue
-        
-        status = row[14] if len(row) > 14 else 'Active'
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        interest = parse_amount(row[11]) if len(row) > 11 else 0
-        
-        total_amount += amount
-        total_interest += interest
-        
-        if status == 'Active':
-            active_loans += 1
-            active_amount += amount
-        else:
-            closed_loans += 1
+    # Only complete rows (with a loanStatus cell) are summed
+    complete = store.row_width >= 15
+    amount = _numbers(store.amount)[complete]
+    interest = _numbers(store.interest)[complete]
+    active = (store.status == STATUS_ACTIVE)[complete]
+    
+    active_loans = int(active.sum())
+    closed_loans = len(active) - active_loans
+    total_amount = float(amount.sum())
+    active_amount = float(amount[active].sum())
+    total_interest = float(interest.sum())
     
     avg_amount = total_amount / total_loans if total_loans > 0 else 0
     
@@ -86,32 +125,26 @@ def get_monthly_disbursement_data(records):
     Get monthly loan disbursement data for trends
     Returns: list of dicts with month and amount
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
-    monthly_data = defaultdict(lambda: {'count': 0, 'amount': 0.0})
+    dated = _dated(store)
+    keys = store.year[dated].astype(np.int32) * 100 + store.month[dated]
+    if not len(keys):
+        return []
     
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        date_str = row[1]
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        
-        dt = parse_date(date_str)
-        if dt:
-            month_key = dt.strftime('%Y-%m')
-            month_label = dt.strftime('%b %Y')
-            monthly_data[month_key]['month'] = month_label
-            monthly_data[month_key]['count'] += 1
-            monthly_data[month_key]['amount'] += amount
+    # np.unique sorts, so months come out in chronological (YYYY-MM) order
+    months, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    amounts = np.bincount(inverse, weights=_numbers(store.amount)[dated])
     
     result = []
-    for key in sorted(monthly_data.keys()):
+    for key, count, amount in zip(months, counts, amounts):
         result.append({
-            'month': monthly_data[key]['month'],
-            'count': monthly_data[key]['count'],
-            'amount': round(monthly_data[key]['amount'], 2)
+            'month': datetime(int(key) // 100, int(key) % 100, 1).strftime('%b %Y'),
+            'count': int(count),
+            'amount': round(float(amount), 2)
         })
     
     return result
@@ -121,33 +154,23 @@ def get_place_wise_distribution(records):
     Get loan distribution by address/place
     Returns: list of dicts with place and metrics
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
-    place_data = defaultdict(lambda: {'count': 0, 'amount': 0.0, 'active': 0})
-    
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        # Use addressEnglish (index 5) for place
-        place = row[5] if len(row) > 5 else 'Unknown'
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        status = row[14] if len(row) > 14 else 'Active'
-        
-        if place.strip():
-            place_data[place]['count'] += 1
-            place_data[place]['amount'] += amount
-            if status == 'Active':
-                place_data[place]['active'] += 1
+    # Use addressEnglish for place
+    places = _group_by_text(
+        store, 'addressEnglish', store.row_width >= 11,
+        _numbers(store.amount), _is_active(store)
+    )
     
     result = []
-    for place, data in place_data.items():
+    for place, count, amount, active in places:
         result.append({
             'place': place,
-            'total_loans': data['count'],
-            'active_loans': data['active'],
-            'total_amount': round(data['amount'], 2)
+            'total_loans': count,
+            'active_loans': active,
+            'total_amount': round(amount, 2)
         })
     
     result.sort(key=lambda x: x['total_amount'], reverse=True)
@@ -158,7 +181,8 @@ def get_loan_amount_ranges(records):
     Categorize loans by amount ranges with detailed breakdowns
     Returns: list of dicts with range and count
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
     ranges = {
@@ -173,16 +197,13 @@ def get_loan_amount_ranges(records):
     
     range_data = defaultdict(int)
     
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        
-        for range_name, (min_val, max_val) in ranges.items():
-            if min_val <= amount < max_val:
-                range_data[range_name] += 1
-                break
+    amounts = _numbers(store.amount)[store.row_width >= 11]
+    amounts = amounts[np.isfinite(amounts) & (amounts >= 0)]
+    
+    lower_bounds = [min_val for min_val, _ in ranges.values()]
+    bins = np.bincount(np.searchsorted(lower_bounds, amounts, side='right') - 1, minlength=len(ranges))
+    for range_name, count in zip(ranges, bins):
+        range_data[range_name] = int(count)
     
     result = []
     for range_name in ['0-2K', '2K-5K', '5K-10K', '10K-25K', '25K-50K', '50K-1L', '1L+']:
@@ -198,26 +219,26 @@ def get_recent_activity(records, days=30):
     Get loans disbursed in recent days
     Returns: list of recent loan dicts
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
     cutoff_date = datetime.now() - timedelta(days=days)
-    recent_loans = []
+    # Loan dates are midnights: on the cutoff day itself only an exact-midnight cutoff qualifies
+    cutoff_ordinal = cutoff_date.toordinal() + (cutoff_date.time() != time.min)
     
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        date_str = row[1]
-        dt = parse_date(date_str)
-        
-        if dt and dt >= cutoff_date:
-            recent_loans.append({
-                'date': date_str,
-                'name': row[3] if len(row) > 3 else '',
-                'amount': parse_amount(row[10]) if len(row) > 10 else 0,
-                'place': row[5] if len(row) > 5 else ''
-            })
+    recent = np.flatnonzero(_dated(store) & (store.date_ordinal >= cutoff_ordinal))
+    dates, names, places = store.column('date'), store.column('nameEnglish'), store.column('addressEnglish')
+    amounts = _numbers(store.amount)
+    
+    recent_loans = []
+    for i in recent:
+        recent_loans.append({
+            'date': dates[i],
+            'name': names[i],
+            'amount': float(amounts[i]),
+            'place': places[i]
+        })
     
     recent_loans.sort(key=lambda x: x['date'], reverse=True)
     return recent_loans
@@ -227,32 +248,22 @@ def get_top_borrowers(records, limit=10):
     Get top borrowers by total loan amount
     Returns: list of top borrower dicts
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
-    borrower_data = defaultdict(lambda: {'loans': 0, 'amount': 0.0, 'active': 0})
-    
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        name = row[3] if len(row) > 3 else 'Unknown'
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        status = row[14] if len(row) > 14 else 'Active'
-        
-        if name.strip():
-            borrower_data[name]['loans'] += 1
-            borrower_data[name]['amount'] += amount
-            if status == 'Active':
-                borrower_data[name]['active'] += 1
+    borrowers = _group_by_text(
+        store, 'nameEnglish', store.row_width >= 11,
+        _numbers(store.amount), _is_active(store)
+    )
     
     result = []
-    for name, data in borrower_data.items():
+    for name, loans, amount, active in borrowers:
         result.append({
             'name': name,
-            'total_loans': data['loans'],
-            'total_amount': round(data['amount'], 2),
-            'active_loans': data['active']
+            'total_loans': loans,
+            'total_amount': round(amount, 2),
+            'active_loans': active
         })
     
     result.sort(key=lambda x: x['total_amount'], reverse=True)
@@ -263,35 +274,23 @@ def get_interest_analysis(records):
     Analyze interest rates and expected returns
     Returns: dict with interest metrics
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return {
             'total_interest_expected': 0,
             'avg_interest_rate': 0,
             'interest_by_status': {}
         }
     
-    total_principal = 0.0
-    total_interest = 0.0
-    active_interest = 0.0
-    closed_interest = 0.0
-    count = 0
+    with_interest = store.row_width >= 12
+    amount = _numbers(store.amount)[with_interest]
+    interest = _numbers(store.interest)[with_interest]
+    active = _is_active(store)[with_interest]
     
-    for row in records[1:]:
-        if len(row) < 12:
-            continue
-        
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        interest = parse_amount(row[11]) if len(row) > 11 else 0
-        status = row[14] if len(row) > 14 else 'Active'
-        
-        total_principal += amount
-        total_interest += interest
-        count += 1
-        
-        if status == 'Active':
-            active_interest += interest
-        else:
-            closed_interest += interest
+    total_principal = float(amount.sum())
+    total_interest = float(interest.sum())
+    active_interest = float(interest[active].sum())
+    closed_interest = float(interest[~active].sum())
     
     avg_rate = (total_interest / total_principal * 100) if total_principal > 0 else 0
     
@@ -311,23 +310,23 @@ def get_quarterly_disbursement_data(records):
     Get quarterly loan disbursement data
     Returns: list of dicts with quarter, count, and amount
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
     quarterly_data = defaultdict(lambda: {'count': 0, 'amount': 0.0})
     
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        date_str = row[1]
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
+    dated = _dated(store)
+    keys = store.year[dated].astype(np.int32) * 10 + (store.month[dated] - 1) // 3 + 1
+    if len(keys):
+        periods, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        amounts = np.bincount(inverse, weights=_numbers(store.amount)[dated])
         
-        dt = parse_date(date_str)
-        if dt:
-            quarter = get_quarter(dt)
-            quarterly_data[quarter]['count'] += 1
-            quarterly_data[quarter]['amount'] += amount
+        for key, count, amount in zip(periods, counts, amounts):
+            quarter = f"Q{int(key) % 10} {int(key) // 10}"
+            quarterly_data[quarter]['count'] = int(count)
+            quarterly_data[quarter]['amount'] = float(amount)
     
     result = []
     for quarter in sorted(quarterly_data.keys()):
@@ -347,8 +346,9 @@ def get_growth_metrics(records):
     - Year-over-year quarterly comparison
     - Year-over-year annual comparison
     """
-    monthly_data = get_monthly_disbursement_data(records)
-    quarterly_data = get_quarterly_disbursement_data(records)
+    store = as_store(records)
+    monthly_data = get_monthly_disbursement_data(store)
+    quarterly_data = get_quarterly_disbursement_data(store)
     
     growth_metrics = {
         'monthly': {},
@@ -424,19 +424,10 @@ def get_growth_metrics(records):
             }
     
     # Year-over-year annual growth
-    yearly_totals = defaultdict(lambda: {'count': 0, 'amount': 0.0})
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        date_str = row[1]
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        
-        dt = parse_date(date_str)
-        if dt:
-            year = str(dt.year)
-            yearly_totals[year]['count'] += 1
-            yearly_totals[year]['amount'] += amount
+    yearly_totals = {
+        year: {'count': data['total_count'], 'amount': data['total_amount']}
+        for year, data in _yearly_totals(store).items()
+    }
     
     if len(yearly_totals) >= 2:
         years = sorted(yearly_totals.keys())
@@ -468,28 +459,11 @@ def get_yearly_summary(records):
     Get year-wise loan summary
     Returns: list of dicts with year, count, amount, active stats
     """
-    if not records or len(records) <= 1:
+    store = as_store(records)
+    if not store.size:
         return []
     
-    yearly_data = defaultdict(lambda: {'total_count': 0, 'total_amount': 0.0, 'active_count': 0, 'active_amount': 0.0})
-    
-    for row in records[1:]:
-        if len(row) < 11:
-            continue
-        
-        date_str = row[1]
-        amount = parse_amount(row[10]) if len(row) > 10 else 0
-        status = row[14] if len(row) > 14 else 'Active'
-        
-        dt = parse_date(date_str)
-        if dt:
-            year = str(dt.year)
-            yearly_data[year]['total_count'] += 1
-            yearly_data[year]['total_amount'] += amount
-            
-            if status == 'Active':
-                yearly_data[year]['active_count'] += 1
-                yearly_data[year]['active_amount'] += amount
+    yearly_data = _yearly_totals(store)
     
     result = []
     for year in sorted(yearly_data.keys()):
@@ -509,6 +483,8 @@ def generate_dashboard_data(records):
     Generate complete dashboard data
     Returns: dict with all metrics and chart data
     """
+    records = as_store(records)
+    
     return {
         'basic_metrics': calculate_basic_metrics(records),
         'monthly_trend': get_monthly_disbursement_data(records),
@@ -0,0 +1,268 @@
+"""
+ANN Index - approximate nearest-neighbour search for large ledgers
+IVF (inverted file) index: vectors are clustered with spherical k-means and
+a query only scores the vectors of its `nprobe` closest clusters.
+Raising nprobe trades latency for recall; nprobe == n_lists is exact search.
+"""
+
+import os
+import numpy as np
+from backend.vector_index import VectorIndex, normalize, top_k_indices
+
+# Below this many vectors a brute-force scan is cheaper than clustering
+MIN_TRAIN_SIZE = 1024
+
+# Retrain once this fraction of the trained rows was replaced or deleted
+REBUILD_RATIO = 0.2
+
+# k-means is trained on a sample of at most this many points per cluster
+SAMPLE_PER_LIST = 256
+
+def _assign(vectors, centroids, chunk_size: int = 16384):
+    """Index of the closest centroid for every vector"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+def _kmeans(vectors, n_lists: int, seed: int = 0, n_iter: int = 10):
+    """Spherical k-means on L2-normalized vectors"""
+    rng = np.random.default_rng(seed)
+
+    sample = vectors
+    if len(vectors) > n_lists * SAMPLE_PER_LIST:
+        sample = vectors[rng.choice(len(vectors), n_lists * SAMPLE_PER_LIST, replace=False)]
+
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+
+        # Re-seed clusters that lost all their points
+        empty = np.bincount(assignments, minlength=n_lists) == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+
+        centroids = normalize(sums)
+
+    return centroids
+
+class IVFIndex:
+    """
+    Approximate cosine-similarity index keyed by record id
+    Records added after training go to a small exact "pending" index and are
+    folded into the clusters by rebuild() once needs_rebuild() says so.
+    """
+
+    def __init__(self, n_lists: int = None, nprobe: int = 8, seed: int = 0):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.seed = seed
+        self.dim = None
+        self._centroids = None
+        self._vectors = None
+        self._ids = []
+        self._offsets = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows = {}
+        self._pending = VectorIndex()
+
+    def __len__(self):
+        return len(self._rows) + len(self._pending)
+
+    def __contains__(self, record_id):
+        return record_id in self._rows or record_id in self._pending
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _kill(self, record_id):
+        row = self._rows.pop(record_id, None)
+        if row is not None:
+            self._alive[row] = False
+
+    def add(self, record_ids: list, vectors):
+        """Add new records or replace existing ones (they stay exact until the next rebuild)"""
+        for record_id in record_ids:
+            self._kill(record_id)
+        self._pending.add(record_ids, vectors)
+        if self.dim is None:
+            self.dim = self._pending.dim
+
+    def delete(self, record_id):
+        self._kill(record_id)
+        self._pending.delete(record_id)
+
+    def needs_rebuild(self) -> bool:
+        if not self.trained:
+            return len(self._pending) >= MIN_TRAIN_SIZE
+
+        stale = len(self._pending) + int((~self._alive).sum())
+        return stale > REBUILD_RATIO * max(len(self._rows), 1)
+
+    def _live_data(self):
+        ids = []
+        parts = []
+        if self.trained:
+            trained_rows = np.flatnonzero(self._alive)
+            ids += [self._ids[row] for row in trained_rows]
+            parts.append(self._vectors[trained_rows])
+        if len(self._pending):
+            ids += self._pending.ids
+            parts.append(self._pending.vectors)
+
+        vectors = np.concatenate(parts) if parts else np.empty((0, self.dim or 0), dtype=np.float32)
+        return ids, vectors
+
+    def rebuild(self):
+        """Re-cluster all live records, including pending ones"""
+        ids, vectors = self._live_data()
+        self.build(ids, vectors)
+
+    def build(self, record_ids: list, vectors):
+        """Train the clusters and index the given records from scratch"""
+        vectors = normalize(np.atleast_2d(vectors))
+        if not len(record_ids):
+            self._centroids = None
+            self._vectors = None
+            self._ids = []
+            self._alive = np.zeros(0, dtype=bool)
+            self._rows = {}
+            self._pending = VectorIndex(self.dim)
+            return
+
+        self.dim = vectors.shape[1]
+        n_lists = self.n_lists or int(round(4 * np.sqrt(len(record_ids))))
+        n_lists = max(1, min(n_lists, len(record_ids)))
+
+        self._centroids = _kmeans(vectors, n_lists, self.seed)
+        assignments = _assign(vectors, self._centroids)
+        order = np.argsort(assignments, kind='stable')
+
+        self._vectors = np.ascontiguousarray(vectors[order])
+        self._ids = [record_ids[i] for i in order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._rows = {record_id: row for row, record_id in enumerate(self._ids)}
+        self._pending = VectorIndex(self.dim)
+
+    def search(self, query_vector, top_k: int = 5, nprobe: int = None) -> list:
+        """
+        Approximate top-k search
+        Args:
+            query_vector: query embedding
+            top_k: number of results
+            nprobe: clusters to scan (defaults to self.nprobe); higher = better recall, slower
+        Returns: list of (record_id, cosine similarity), best first
+        """
+        query = normalize(query_vector)
+        results = self._pending.search(query, top_k)
+
+        if self.trained and self._rows:
+            nprobe = max(1, min(nprobe or self.nprobe, len(self._centroids)))
+            lists = top_k_indices(self._centroids @ query, nprobe)
+            rows = np.concatenate([
+                np.arange(self._offsets[l], self._offsets[l + 1]) for l in lists
+            ])
+            rows = rows[self._alive[rows]]
+
+            scores = self._vectors[rows] @ query
+            best = top_k_indices(scores, top_k)
+            results += [(self._ids[rows[i]], float(scores[i])) for i in best]
+
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:top_k]
+
+    def exact_search(self, query_vector, top_k: int = 5) -> list:
+        """Brute-force search over the same records, for recall measurement"""
+        ids, vectors = self._live_data()
+        if not ids:
+            return []
+        scores = vectors @ normalize(query_vector)
+        return [(ids[i], float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+    def evaluate_recall(self, n_queries: int = 100, top_k: int = 10, nprobe: int = None) -> float:
+        """
+        Recall@k against exact search, using indexed vectors as queries
+        Returns: fraction of the exact top-k that the approximate search also returns
+        """
+        ids, vectors = self._live_data()
+        if not ids:
+            return 1.0
+
+        rng = np.random.default_rng(self.seed)
+        sample = rng.choice(len(ids), min(n_queries, len(ids)), replace=False)
+
+        hits = 0
+        total = 0
+        for i in sample:
+            expected = {ids[j] for j in top_k_indices(vectors @ vectors[i], top_k)}
+            found = {record_id for record_id, _ in self.search(vectors[i], top_k, nprobe)}
+            hits += len(expected & found)
+            total += len(expected)
+
+        return hits / total if total else 1.0
+
+    def save(self, path: str, tags: dict = None):
+        """
+        Write the index to an .npz file (atomically)
+        Args:
+            path: destination file
+            tags: optional dict of record_id -> str saved alongside (e.g. text hashes)
+        """
+        tags = tags or {}
+        dim = self.dim or 0
+        arrays = {
+            'params': np.array([self.n_lists or 0, self.nprobe, self.seed, dim]),
+            'centroids': self._centroids if self.trained else np.empty((0, dim), dtype=np.float32),
+            'vectors': self._vectors if self.trained else np.empty((0, dim), dtype=np.float32),
+            'ids': np.array(self._ids, dtype=str),
+            'offsets': self._offsets if self.trained else np.zeros(1, dtype=np.int64),
+            'alive': self._alive,
+            'pending_ids': np.array(self._pending.ids, dtype=str),
+            'pending_vectors': self._pending.vectors if len(self._pending) else np.empty((0, dim), dtype=np.float32),
+            'tag_ids': np.array(list(tags.keys()), dtype=str),
+            'tag_values': np.array(list(tags.values()), dtype=str),
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Read an index written by save()
+        Returns: (index, tags)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            n_lists, nprobe, seed, dim = (int(v) for v in data['params'])
+            index = cls(n_lists or None, nprobe, seed)
+            index.dim = dim or None
+
+            if len(data['centroids']):
+                index._centroids = data['centroids']
+                index._vectors = data['vectors']
+                index._ids = data['ids'].tolist()
+                index._offsets = data['offsets']
+                index._alive = data['alive']
+                index._rows = {
+                    record_id: row for row, record_id in enumerate(index._ids) if index._alive[row]
+                }
+
+            index._pending = VectorIndex(index.dim)
+            if len(data['pending_ids']):
+                index._pending.add(data['pending_ids'].tolist(), data['pending_vectors'])
+
+            tags = dict(zip(data['tag_ids'].tolist(), data['tag_values'].tolist()))
+
+        return index, tags
@@ -0,0 +1,71 @@
+"""
+BM25 - ranked term index for lexical search
+Okapi BM25 over whitespace tokens of already-normalized texts. Each posting
+stores its final BM25 weight (term IDF times the length-normalized term
+frequency), so scoring a query is one array slice per query term plus a
+single scatter-add.
+"""
+
+import string
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+_PUNCTUATION = string.punctuation + '।'
+
+def tokenize(text: str) -> list:
+    """Whitespace tokens with surrounding punctuation removed (text must already be lowercased)"""
+    tokens = (token.strip(_PUNCTUATION) for token in text.split())
+    return [token for token in tokens if token]
+
+class BM25Index:
+    """
+    Immutable BM25 index over texts[0..n-1]
+    Positions in scores() line up with the texts the index was built from.
+    """
+
+    def __init__(self, texts: list, k1: float = K1, b: float = B):
+        self.size = len(texts)
+        self._vocabulary = {}
+
+        term_ids, lengths = [], []
+        for text in texts:
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            term_ids.extend(self._vocabulary.setdefault(token, len(self._vocabulary)) for token in tokens)
+
+        lengths = np.array(lengths, dtype=np.int64)
+        owners = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+        terms = np.array(term_ids, dtype=np.int64)
+
+        # One posting per (term, text) with its frequency, sorted by term then position
+        keys, frequency = np.unique(terms * max(1, self.size) + owners, return_counts=True)
+        terms, positions = np.divmod(keys, max(1, self.size))
+
+        self._offsets = np.searchsorted(terms, np.arange(len(self._vocabulary) + 1))
+        self._positions = positions.astype(np.int32)
+
+        document_frequency = np.diff(self._offsets)
+        idf = np.log(1 + (self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = lengths.mean() if self.size and lengths.any() else 1.0
+        norm = k1 * (1 - b + b * lengths[positions] / average_length)
+        self._weights = (idf[terms] * frequency * (k1 + 1) / (frequency + norm)).astype(np.float32)
+
+    def scores(self, query: str):
+        """
+        BM25 score of every text for a lowercased query (0 where no term matches)
+        Returns: float32 array of length size, or None if the query has no tokens
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return None
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in tokens:
+            term = self._vocabulary.get(token)
+            if term is not None:
+                start, stop = self._offsets[term], self._offsets[term + 1]
+                # A term has at most one posting per position
+                scores[self._positions[start:stop]] += self._weights[start:stop]
+        return scores
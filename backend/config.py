@@ -6,7 +6,27 @@ load_dotenv()
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 GEMINI_EMBEDDING_URL = "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:embedContent"
+GEMINI_BATCH_EMBEDDING_URL = "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:batchEmbedContents"
 GEMINI_API_KEY = st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
+EMBEDDING_MODEL = "text-embedding-004"
+
+# Record embeddings are cached on disk, keyed by hash(model + record text)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+
+# batchEmbedContents accepts at most 100 texts per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+
+# Approximate (IVF) Smart Search index: clusters scanned per query and on-disk location
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", ".cache/semantic_ivf.npz")
+
+# Smart Search vectors: "gemini" (embedding API) or "local" (offline hashed
+# character n-grams, see backend/hashed_embeddings.py). Without a Gemini key
+# Smart Search always runs locally.
+SEMANTIC_BACKEND = os.getenv("SEMANTIC_BACKEND", "gemini").lower()
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "512"))
+LOCAL_EMBEDDING_NGRAMS = tuple(int(n) for n in os.getenv("LOCAL_EMBEDDING_NGRAMS", "2,4").split(","))
+LOCAL_EMBEDDING_TFIDF = os.getenv("LOCAL_EMBEDDING_TFIDF", "true").lower() in ("1", "true", "yes")
 
 
 # Add these lines to your config.py file:
@@ -14,9 +34,77 @@ GEMINI_API_KEY = st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Shared HTTP session: keep-alive connections per host, timeouts and retries
+HTTP_POOL_SIZES = {
+    "generativelanguage.googleapis.com": int(os.getenv("HTTP_POOL_SIZE_GEMINI", "8")),
+    "api.groq.com": int(os.getenv("HTTP_POOL_SIZE_GROQ", "4")),
+    "default": int(os.getenv("HTTP_POOL_SIZE", "4")),
+}
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+# Read timeouts: default, full Gemini extraction, batched embeddings
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "90"))
+EMBEDDING_BATCH_READ_TIMEOUT = float(os.getenv("EMBEDDING_BATCH_READ_TIMEOUT", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+# Requests-per-minute quotas enforced client-side for each LLM provider
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+
+# Deep Search batches sent to the LLM concurrently
+DEEP_SEARCH_WORKERS = int(os.getenv("DEEP_SEARCH_WORKERS", "4"))
+
+# Deep Search only sends the top-N lexically closest records to the LLM;
+# with the fallback on, the rest are scanned when the shortlist has no match
+DEEP_SEARCH_SHORTLIST = int(os.getenv("DEEP_SEARCH_SHORTLIST", "100"))
+DEEP_SEARCH_FULL_SCAN_FALLBACK = os.getenv("DEEP_SEARCH_FULL_SCAN_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# Hybrid Search: candidates taken from each ranking (BM25 and vectors) and the
+# reciprocal rank fusion constant k in 1 / (k + rank)
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+# Search results kept per (query, mode, data version); 0 disables the cache
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "128"))
+
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 SPREADSHEET_ID = st.secrets.get("SPREADSHEET_ID") or os.getenv("SPREADSHEET_ID")
 
+# Client-side Sheets quotas (requests per minute per quota class) and retry budget
+SHEETS_READ_RPM = float(os.getenv("SHEETS_READ_RPM", "60"))
+SHEETS_WRITE_RPM = float(os.getenv("SHEETS_WRITE_RPM", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+
+# "google" (default) or "fake" for the in-process stand-in in backend/fake_sheets.py
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "google").lower()
+FAKE_SHEETS_ROWS = int(os.getenv("FAKE_SHEETS_ROWS", "1000"))
+FAKE_SHEETS_LATENCY_MS = float(os.getenv("FAKE_SHEETS_LATENCY_MS", "0"))
+FAKE_SHEETS_ERROR_RATE = float(os.getenv("FAKE_SHEETS_ERROR_RATE", "0"))
+FAKE_SHEETS_READ_QUOTA = int(os.getenv("FAKE_SHEETS_READ_QUOTA", "0")) or None
+FAKE_SHEETS_WRITE_QUOTA = int(os.getenv("FAKE_SHEETS_WRITE_QUOTA", "0")) or None
+FAKE_SHEETS_PATH = os.getenv("FAKE_SHEETS_PATH", "")
+
+if SHEETS_BACKEND == "fake" and not SPREADSHEET_ID:
+    SPREADSHEET_ID = "fake"
+
+# Seconds the shared in-process copy of Sheet1 is served before re-reading it
+RECORDS_TTL_SECONDS = float(os.getenv("RECORDS_TTL_SECONDS", "60"))
+
+# Refreshes fetch only new rows and the status column; a full re-read still happens this often
+RECORDS_FULL_SYNC_SECONDS = float(os.getenv("RECORDS_FULL_SYNC_SECONDS", "3600"))
+
+# Rows per request when streaming the sheet with sheets.iter_records
+READ_CHUNK_ROWS = int(os.getenv("READ_CHUNK_ROWS", "5000"))
+
+# Cells per values().batchUpdate call for bulk loan-status changes
+STATUS_UPDATE_CHUNK_SIZE = int(os.getenv("STATUS_UPDATE_CHUNK_SIZE", "500"))
+
+# New records are journaled locally and appended to the sheet in batches by a background worker
+WRITE_QUEUE_PATH = os.getenv("WRITE_QUEUE_PATH", ".cache/write_queue.sqlite3")
+WRITE_QUEUE_BATCH_SIZE = int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "50"))
+WRITE_QUEUE_FLUSH_SECONDS = float(os.getenv("WRITE_QUEUE_FLUSH_SECONDS", "2"))
+
 # Ensure USERS is always a dictionary, never None
 USERS = st.secrets.get("USERS") or os.getenv("USERS")
 
@@ -0,0 +1,88 @@
+"""
+Embedding Store - persistent on-disk cache of record embeddings
+Vectors are keyed by a hash of the model name plus the exact record text,
+so a record is only embedded again when its text (or the model) changes.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from backend.config import EMBEDDING_CACHE_PATH, EMBEDDING_MODEL
+
+_lock = threading.Lock()
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+def embedding_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    """Stable cache key for a (model, text) pair"""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+def _connect():
+    directory = os.path.dirname(EMBEDDING_CACHE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(EMBEDDING_CACHE_PATH, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+    )
+    return conn
+
+def get_many(keys: list) -> dict:
+    """
+    Look up cached vectors
+    Args:
+        keys: list of keys from embedding_key()
+    Returns: dict of key -> float32 numpy vector (missing keys are absent)
+    """
+    found = {}
+    unique_keys = list(dict.fromkeys(keys))
+    if not unique_keys:
+        return found
+
+    with _lock:
+        conn = _connect()
+        try:
+            for start in range(0, len(unique_keys), _LOOKUP_CHUNK):
+                chunk = unique_keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        finally:
+            conn.close()
+
+    return found
+
+def put_many(entries: dict, model: str = EMBEDDING_MODEL):
+    """
+    Persist vectors
+    Args:
+        entries: dict of key -> vector (list or numpy array)
+        model: embedding model the vectors came from
+    """
+    if not entries:
+        return
+
+    rows = [
+        (key, model, np.asarray(vector, dtype=np.float32).tobytes())
+        for key, vector in entries.items()
+    ]
+
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    rows
+                )
+        finally:
+            conn.close()
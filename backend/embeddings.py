@@ -1,6 +1,10 @@
 import streamlit as st
-import requests
-from backend.config import GEMINI_API_KEY, GEMINI_EMBEDDING_URL
+from backend import http_client
+from backend.config import (
+    GEMINI_API_KEY, GEMINI_EMBEDDING_URL, GEMINI_BATCH_EMBEDDING_URL,
+    EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_READ_TIMEOUT
+)
+from backend.embedding_store import embedding_key, get_many, put_many
 
 def get_embedding(text: str) -> list:
     if not GEMINI_API_KEY or not text.strip():
@@ -18,7 +22,7 @@ def get_embedding(text: str) -> list:
     }
     
     try:
-        response = requests.post(GEMINI_EMBEDDING_URL, headers=headers, json=payload, timeout=30)
+        response = http_client.post(GEMINI_EMBEDDING_URL, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         
@@ -27,4 +31,101 @@ def get_embedding(text: str) -> list:
         return None
     except Exception as e:
         st.warning(f"Embedding error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _embed_batch(texts: list) -> list:
+    headers = {
+        "Content-Type": "application/json",
+        "X-goog-api-key": GEMINI_API_KEY
+    }
+    
+    payload = {
+        "requests": [
+            {
+                "model": f"models/{EMBEDDING_MODEL}",
+                "content": {"parts": [{"text": text}]}
+            }
+            for text in texts
+        ]
+    }
+    
+    response = http_client.post(GEMINI_BATCH_EMBEDDING_URL, headers=headers, json=payload, timeout=EMBEDDING_BATCH_READ_TIMEOUT)
+    response.raise_for_status()
+    embeddings = response.json().get("embeddings", [])
+    
+    vectors = []
+    for i in range(len(texts)):
+        values = embeddings[i].get("values") if i < len(embeddings) else None
+        vectors.append(values or None)
+    return vectors
+
+def get_embeddings(texts: list, batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """
+    Embed many texts with batchEmbedContents
+    Args:
+        texts: list of strings
+        batch_size: texts per API request
+    Returns: list aligned with texts; None for empty texts and items that failed
+    Items missing from a successful batch response are retried one by one; a
+    failed batch is not (its error usually applies to every item), and a 429
+    stops the remaining batches since the quota is exhausted.
+    """
+    results = [None] * len(texts)
+    if not GEMINI_API_KEY:
+        return results
+    
+    pending = [i for i, text in enumerate(texts) if text and text.strip()]
+    failed, error = 0, None
+    
+    for start in range(0, len(pending), batch_size):
+        indices = pending[start:start + batch_size]
+        
+        try:
+            vectors = _embed_batch([texts[i] for i in indices])
+        except Exception as e:
+            failed, error = failed + len(indices), e
+            response = getattr(e, 'response', None)
+            if response is not None and response.status_code == 429:
+                failed = len(pending) - start
+                break
+            continue
+        
+        for i, vector in zip(indices, vectors):
+            results[i] = vector if vector else get_embedding(texts[i])
+    
+    if failed:
+        st.warning(f"Batch embedding error, {failed} texts not embedded: {error}")
+    
+    return results
+
+def get_record_embeddings(texts: list) -> list:
+    """
+    Embeddings for many record texts, served from the on-disk store when possible.
+    Only texts that were never embedded before (new or edited records) hit the API,
+    and those are sent in batches.
+    Returns: list aligned with texts; None where no vector could be computed
+    """
+    keys = [embedding_key(text) for text in texts]
+    cached = get_many(keys)
+    
+    results = [cached.get(key) for key in keys]
+    
+    missing = {}
+    for i, key in enumerate(keys):
+        if results[i] is None and key not in missing:
+            missing[key] = texts[i]
+    
+    new_entries = {}
+    if missing:
+        vectors = get_embeddings(list(missing.values()))
+        for key, vector in zip(missing.keys(), vectors):
+            if vector:
+                new_entries[key] = vector
+    
+    put_many(new_entries)
+    
+    for i, key in enumerate(keys):
+        if results[i] is None:
+            results[i] = new_entries.get(key)
+    
+    return results
@@ -0,0 +1,325 @@
+"""
+Fake Sheets - in-process stand-in for the Google Sheets API
+Implements the part of `service.spreadsheets()` the app uses
+(values().get/batchGet/append/update/batchUpdate) over an in-memory grid,
+with configurable latency, quota errors and synthetic ledgers, so sync,
+caching and write paths can be exercised and benchmarked without a real sheet.
+
+Enable it with SHEETS_BACKEND=fake (see backend.config), or run
+    python -m backend.fake_sheets --rows 100000
+for a quick benchmark of the read and write paths.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+
+_RANGE_RE = re.compile(
+    r"^(?:(?P<sheet>[^!]+)!)?(?P<c1>[A-Z]+)?(?P<r1>\d+)?(?::(?P<c2>[A-Z]+)?(?P<r2>\d+)?)?$"
+)
+
+FIRST_NAMES = ["Ram", "Shyam", "Sita", "Geeta", "Mohan", "Sohan", "Radha", "Kamla", "Raju", "Suresh"]
+FIRST_NAMES_HINDI = ["राम", "श्याम", "सीता", "गीता", "मोहन", "सोहन", "राधा", "कमला", "राजू", "सुरेश"]
+LAST_NAMES = ["Lal", "Kumar", "Devi", "Prasad", "Singh", "Yadav", "Sharma", "Gupta"]
+LAST_NAMES_HINDI = ["लाल", "कुमार", "देवी", "प्रसाद", "सिंह", "यादव", "शर्मा", "गुप्ता"]
+PLACES = ["Patna", "Gaya", "Ara", "Buxar", "Danapur", "Hajipur"]
+PLACES_HINDI = ["पटना", "गया", "आरा", "बक्सर", "दानापुर", "हाजीपुर"]
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+def _column_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def parse_range(a1: str):
+    """
+    Parse an A1 range like 'Sheet1!A2:O', 'Sheet1!O5' or 'Sheet1!A:O'
+    Returns: (first_row, last_row, first_col, last_col), 0-based, None = unbounded
+    """
+    match = _RANGE_RE.match(a1)
+    if not match:
+        raise ValueError(f"Unsupported range: {a1}")
+
+    c1, r1, c2, r2 = match.group('c1', 'r1', 'c2', 'r2')
+    if ':' not in a1:
+        c2, r2 = c1, r1
+
+    first_row = int(r1) - 1 if r1 else 0
+    last_row = int(r2) - 1 if r2 else None
+    first_col = _column_index(c1) if c1 else 0
+    last_col = _column_index(c2) if c2 else None
+    return first_row, last_row, first_col, last_col
+
+def generate_ledger(n_rows: int, seed: int = 0, closed_ratio: float = 0.3) -> list:
+    """Synthetic Sheet1 contents: header plus n_rows bilingual loan records"""
+    from backend.sheets import HEADERS
+
+    rng = random.Random(seed)
+    rows = [list(HEADERS)]
+    for i in range(n_rows):
+        first = rng.randrange(len(FIRST_NAMES))
+        last = rng.randrange(len(LAST_NAMES))
+        place = rng.randrange(len(PLACES))
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2019, 2025)
+        date = f"{day:02d}/{month:02d}/{year}"
+        rows.append([
+            f"{FIRST_NAMES[first]}_{date.replace('/', '')}_{i % 10000:04d}",
+            date,
+            f"{FIRST_NAMES_HINDI[first]} {LAST_NAMES_HINDI[last]}",
+            f"{FIRST_NAMES[first]} {LAST_NAMES[last]}",
+            f"{PLACES_HINDI[place]}",
+            f"{PLACES[place]}",
+            f"Ward {rng.randint(1, 40)}",
+            f"9{rng.randint(100000000, 999999999)}",
+            'd2',
+            str(rng.randint(1, 300)),
+            str(rng.choice([1000, 2000, 5000, 10000, 25000, 50000])),
+            rng.choice(['2', '3', '5', 'NA']),
+            rng.choice(['6', '12', '24', 'NA']),
+            f"Father {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'Closed' if rng.random() < closed_ratio else 'Active',
+        ])
+    return rows
+
+class FakeRequest:
+    """Mimics googleapiclient's HttpRequest: nothing happens until execute()"""
+
+    def __init__(self, backend, quota_class: str, operation):
+        self._backend = backend
+        self._quota_class = quota_class
+        self._operation = operation
+
+    def execute(self, num_retries: int = 0):
+        self._backend._before_call(self._quota_class)
+        with self._backend._lock:
+            return self._operation()
+
+class FakeValues:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return FakeRequest(self._backend, 'read', lambda: self._backend._read(range))
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        return FakeRequest(self._backend, 'read', lambda: {
+            'spreadsheetId': spreadsheetId,
+            'valueRanges': [self._backend._read(a1) for a1 in ranges],
+        })
+
+    def update(self, spreadsheetId, range, body, valueInputOption='RAW', **kwargs):
+        return FakeRequest(self._backend, 'write', lambda: self._backend._write(range, body.get('values', [])))
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        def operation():
+            responses = [self._backend._write(item['range'], item.get('values', [])) for item in body.get('data', [])]
+            return {
+                'spreadsheetId': spreadsheetId,
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses,
+            }
+        return FakeRequest(self._backend, 'write', operation)
+
+    def append(self, spreadsheetId, range, body, valueInputOption='RAW', insertDataOption='INSERT_ROWS', **kwargs):
+        return FakeRequest(self._backend, 'write', lambda: self._backend._append(range, body.get('values', [])))
+
+class FakeSpreadsheets:
+    """
+    Drop-in for `build('sheets', 'v4', ...).spreadsheets()`
+    Args:
+        rows: initial grid (list of rows, header first)
+        latency: seconds added to every call
+        jitter: extra random latency, uniform in [0, jitter] seconds
+        error_rate: probability that a call fails with HTTP 429
+        read_quota / write_quota: calls allowed per rolling minute before HTTP 429 (None = unlimited)
+        path: optional JSON file the grid is loaded from and saved to after each write
+        seed: seed for jitter and injected errors
+    """
+
+    def __init__(self, rows: list = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, read_quota: int = None, write_quota: int = None,
+                 path: str = None, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quotas = {'read': read_quota, 'write': write_quota}
+        self.path = path
+        self.stats = {'read': 0, 'write': 0, 'errors': 0, 'cells_read': 0, 'cells_written': 0}
+        self._calls = {'read': [], 'write': []}
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+
+        if rows is None and path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                rows = json.load(f)
+        self.rows = [list(row) for row in (rows or [])]
+
+    def values(self):
+        return FakeValues(self)
+
+    def get(self, spreadsheetId, **kwargs):
+        def operation():
+            return {'sheets': [{'properties': {
+                'title': 'Sheet1',
+                'gridProperties': {'rowCount': max(len(self.rows), 1000), 'columnCount': 26},
+            }}]}
+        return FakeRequest(self, 'read', operation)
+
+    def reset_stats(self):
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def _error(self, status: int, message: str):
+        self.stats['errors'] += 1
+        return HttpError(httplib2.Response({'status': status}), json.dumps({'error': {'message': message}}).encode())
+
+    def _before_call(self, quota_class: str):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            self.stats[quota_class] += 1
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise self._error(429, "Injected quota error")
+
+            quota = self.quotas[quota_class]
+            if quota is not None:
+                now = time.monotonic()
+                calls = [t for t in self._calls[quota_class] if now - t < 60]
+                if len(calls) >= quota:
+                    self._calls[quota_class] = calls
+                    raise self._error(429, f"Quota exceeded for {quota_class} requests per minute")
+                calls.append(now)
+                self._calls[quota_class] = calls
+
+    def _read(self, a1: str) -> dict:
+        first_row, last_row, first_col, last_col = parse_range(a1)
+        last_row = len(self.rows) - 1 if last_row is None else min(last_row, len(self.rows) - 1)
+
+        values = []
+        for row in self.rows[first_row:last_row + 1]:
+            cells = row[first_col:] if last_col is None else row[first_col:last_col + 1]
+            while cells and cells[-1] == '':
+                cells = cells[:-1]
+            values.append(list(cells))
+
+        # Like the real API, trailing empty rows are not returned
+        while values and not values[-1]:
+            values.pop()
+
+        self.stats['cells_read'] += sum(len(cells) for cells in values)
+        result = {'range': a1, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    def _write(self, a1: str, values: list) -> dict:
+        first_row, _, first_col, _ = parse_range(a1)
+
+        updated = 0
+        for offset, cells in enumerate(values):
+            row_index = first_row + offset
+            while len(self.rows) <= row_index:
+                self.rows.append([])
+            row = self.rows[row_index]
+            if len(row) < first_col + len(cells):
+                row.extend([''] * (first_col + len(cells) - len(row)))
+            for col_offset, value in enumerate(cells):
+                row[first_col + col_offset] = '' if value is None else str(value)
+                updated += 1
+
+        self.stats['cells_written'] += updated
+        self._save()
+        return {
+            'updatedRange': a1,
+            'updatedRows': len(values),
+            'updatedColumns': max((len(cells) for cells in values), default=0),
+            'updatedCells': updated,
+        }
+
+    def _append(self, a1: str, values: list) -> dict:
+        # Appends go after the last non-empty row of the table
+        last = len(self.rows)
+        while last and not any(self.rows[last - 1]):
+            last -= 1
+
+        _, _, first_col, _ = parse_range(a1)
+        start = f"{_column_letters(first_col)}{last + 1}"
+        result = self._write(f"Sheet1!{start}", values)
+        return {'tableRange': a1, 'updates': result}
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.rows, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def create_from_config() -> FakeSpreadsheets:
+    """Fake backend configured from FAKE_SHEETS_* settings"""
+    from backend.config import (
+        FAKE_SHEETS_ROWS, FAKE_SHEETS_LATENCY_MS, FAKE_SHEETS_ERROR_RATE,
+        FAKE_SHEETS_READ_QUOTA, FAKE_SHEETS_WRITE_QUOTA, FAKE_SHEETS_PATH
+    )
+
+    rows = None
+    if not (FAKE_SHEETS_PATH and os.path.exists(FAKE_SHEETS_PATH)):
+        rows = generate_ledger(FAKE_SHEETS_ROWS)
+
+    return FakeSpreadsheets(
+        rows=rows,
+        latency=FAKE_SHEETS_LATENCY_MS / 1000.0,
+        jitter=FAKE_SHEETS_LATENCY_MS / 4000.0,
+        error_rate=FAKE_SHEETS_ERROR_RATE,
+        read_quota=FAKE_SHEETS_READ_QUOTA,
+        write_quota=FAKE_SHEETS_WRITE_QUOTA,
+        path=FAKE_SHEETS_PATH,
+    )
+
+def _benchmark(n_rows: int, latency_ms: float):
+    from backend import sheets, replica
+
+    fake = FakeSpreadsheets(generate_ledger(n_rows), latency=latency_ms / 1000.0)
+    sheets._spreadsheets = fake
+    sheets.SPREADSHEET_ID = sheets.SPREADSHEET_ID or 'fake'
+
+    def timed(label, fn):
+        fake.reset_stats()
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{label:<40} {elapsed:>9.1f} ms  calls={fake.stats['read'] + fake.stats['write']:<4} "
+              f"cells_read={fake.stats['cells_read']:<9} cells_written={fake.stats['cells_written']}")
+
+    print(f"Synthetic ledger: {n_rows} rows, {latency_ms} ms simulated latency per call")
+    timed("full read (fetch_all_rows)", sheets.fetch_all_rows)
+    timed("replica cold load", lambda: replica.get_snapshot(max_age=0))
+    timed("append 1 record", lambda: sheets.append_rows([sheets.build_record_row({'nameEnglish': 'Bench'})]))
+    timed("replica delta sync", lambda: replica.get_snapshot(max_age=0))
+    timed("stream loanStatus column", lambda: sum(1 for _ in sheets.iter_records(['loanStatus'])))
+    timed("bulk close 100 loans", lambda: sheets.update_loan_statuses([(row, 'Closed') for row in range(2, 102)]))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Sheets access paths against the fake backend")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    _benchmark(args.rows, args.latency_ms)
@@ -0,0 +1,163 @@
+"""
+Hashed Embeddings - offline character n-gram vectors for Smart Search
+Text is lowercased and every word is padded with spaces (" raj ", " पटना "),
+then each character n-gram (code points, so Devanagari and Latin alike) is
+hashed into one of `dim` buckets with a sign taken from another hash bit, so
+collisions tend to cancel out. With TF-IDF on, buckets are weighted by their
+inverse document frequency over the ledger, which makes rare grams (names,
+localities) count for more than common ones.
+
+No network and no model download: the hash (FNV-1a over code points) is
+computed for all texts in one NumPy pass, and the same text always lands in
+the same buckets, so queries and records are embedded alike.
+"""
+
+import threading
+import numpy as np
+from backend.config import LOCAL_EMBEDDING_DIM, LOCAL_EMBEDDING_NGRAMS, LOCAL_EMBEDDING_TFIDF
+
+FNV_OFFSET = np.uint32(0x811c9dc5)
+FNV_PRIME = np.uint32(0x01000193)
+
+SPACE = ord(' ')
+WHITESPACE = np.array([ord(char) for char in '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002'
+                       '\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'],
+                      dtype=np.uint32)
+
+_embedder = None
+_lock = threading.Lock()
+
+def _hash_ngrams(texts: list, ngram_range: tuple, dim: int) -> list:
+    """Per n-gram size: (owner text of every occurrence, bucket, sign)"""
+    # One lowercased buffer: every text padded with spaces, texts separated by NUL
+    buffer = '\0'.join(f" {text} " for text in texts).lower()
+    chars = np.frombuffer(buffer.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32).copy()
+    chars[np.isin(chars, WHITESPACE)] = SPACE
+    lengths = np.fromiter((len(text) + 2 for text in texts), dtype=np.int64, count=len(texts))
+    owner = np.repeat(np.arange(len(texts), dtype=np.int64), lengths + 1)[:len(chars)]
+
+    # Running counts of NULs and spaces: an n-gram may not contain a NUL, and
+    # spaces only at its ends, so grams never span two words (" raj", "raj ")
+    separators = np.concatenate(([0], np.cumsum(chars == 0, dtype=np.int32)))
+    spaces = chars == SPACE
+    space_count = np.concatenate(([0], np.cumsum(spaces, dtype=np.int32)))
+    codes = chars
+
+    # FNV-1a of the n-gram starting at every position, extended one character per n
+    hashes = np.full(len(codes), FNV_OFFSET, dtype=np.uint32)
+    occurrences = []
+    for n in range(1, ngram_range[1] + 1):
+        count = len(chars) - n + 1
+        if count <= 0:
+            break
+        hashes = (hashes[:count] ^ codes[n - 1:]) * FNV_PRIME
+        if n < ngram_range[0]:
+            continue
+
+        valid = separators[n:n + count] == separators[:count]
+        if n > 2:
+            valid &= space_count[n - 1:n - 1 + count] == space_count[1:1 + count]
+        else:
+            valid &= ~(spaces[:count] & spaces[n - 1:])
+        starts = np.flatnonzero(valid)
+        mixed = hashes[starts]
+        mixed ^= mixed >> np.uint32(15)
+
+        # Bucket from the low bits, sign from the top bit
+        buckets = mixed % np.uint32(dim)
+        signs = (mixed >> np.uint32(31)).astype(np.float32) * -2 + 1
+        occurrences.append((owner[starts], buckets, signs))
+    return occurrences
+
+class HashedNgramEmbedder:
+    """
+    Fixed-size vectors from hashed character n-grams
+    Args:
+        dim: number of hash buckets (vector length)
+        ngram_range: (smallest, largest) n-gram length
+        tfidf: weight buckets by inverse document frequency once fit() has run
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: tuple = (2, 4), tfidf: bool = True):
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self.tfidf = tfidf
+        self.idf = None
+
+    @property
+    def name(self) -> str:
+        """Identifies the vector space (used in embedding cache keys)"""
+        weighting = 'tfidf' if self.tfidf else 'tf'
+        return f"hashed-ngram-{self.ngram_range[0]}-{self.ngram_range[1]}-{self.dim}-{weighting}"
+
+    def counts(self, texts: list):
+        """Signed n-gram counts per bucket, float32 matrix of shape (len(texts), dim)"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not len(texts):
+            return matrix
+
+        cells = matrix.reshape(-1)
+        for owners, buckets, signs in _hash_ngrams(list(texts), self.ngram_range, self.dim):
+            np.add.at(cells, owners * self.dim + buckets, signs)
+        return matrix
+
+    def _fit_counts(self, counts, n_texts: int):
+        if self.tfidf:
+            document_frequency = np.count_nonzero(counts, axis=0)
+            self.idf = (np.log((1 + n_texts) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    def _vectors(self, counts):
+        if self.idf is not None:
+            counts *= self.idf
+        norms = np.linalg.norm(counts, axis=1, keepdims=True)
+        return np.divide(counts, norms, out=counts, where=norms > 0)
+
+    def fit(self, texts: list) -> 'HashedNgramEmbedder':
+        """Learn bucket IDF weights from a corpus (no-op without tfidf)"""
+        if self.tfidf:
+            self._fit_counts(self.counts(texts), len(texts))
+        return self
+
+    def fit_embed(self, texts: list):
+        """fit(texts) followed by embed_many(texts), counting n-grams only once"""
+        counts = self.counts(texts)
+        self._fit_counts(counts, len(texts))
+        return self._vectors(counts)
+
+    def embed_many(self, texts: list):
+        """L2-normalized float32 vectors, one row per text (all-zero for texts without n-grams)"""
+        return self._vectors(self.counts(texts))
+
+    def embed(self, text: str):
+        """Vector for one text, or None if it has no n-grams (e.g. blank)"""
+        vector = self.embed_many([text])[0]
+        return vector if vector.any() else None
+
+def _new_embedder() -> HashedNgramEmbedder:
+    return HashedNgramEmbedder(LOCAL_EMBEDDING_DIM, LOCAL_EMBEDDING_NGRAMS, LOCAL_EMBEDDING_TFIDF)
+
+# Name of the configured vector space, for embedding cache keys
+LOCAL_EMBEDDING_MODEL = _new_embedder().name
+
+def get_local_embedder() -> HashedNgramEmbedder:
+    """
+    Process-wide embedder configured by LOCAL_EMBEDDING_*
+    Its IDF weights come from the first texts passed to get_local_embeddings()
+    and stay fixed afterwards, so vectors already indexed remain comparable.
+    """
+    global _embedder
+    with _lock:
+        if _embedder is None:
+            _embedder = _new_embedder()
+        return _embedder
+
+def get_local_embeddings(texts: list) -> list:
+    """Like embeddings.get_record_embeddings, computed locally: list aligned with texts, None where empty"""
+    global _embedder
+    with _lock:
+        if _embedder is None:
+            _embedder = _new_embedder()
+            vectors = _embedder.fit_embed(texts)
+        else:
+            vectors = _embedder.embed_many(texts)
+    return [vector if vector.any() else None for vector in vectors]
@@ -0,0 +1,105 @@
+"""
+HTTP Client - shared keep-alive session for Gemini, Groq and embedding calls
+One process-wide requests.Session reuses TCP/TLS connections across calls,
+sessions and threads, with per-host pool sizes and retry with backoff.
+Only failures that happen before a request is sent (connect errors) and
+RETRY_STATUSES are retried: a read timeout on a POST may already have been
+processed (and billed), so the caller's fallback takes over instead.
+"""
+
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+from backend.config import (
+    GEMINI_API_URL, GROQ_API_URL, HTTP_POOL_SIZES, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR
+)
+
+# 429/503 are not retried here: callers fall back to another provider instead
+RETRY_STATUSES = (500, 502, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+def _host_prefix(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+def _make_adapter(pool_size: int) -> HTTPAdapter:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        read=0,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,  # POSTs too, for connect errors and RETRY_STATUSES only
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+def get_session() -> requests.Session:
+    """Process-wide session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                default_size = HTTP_POOL_SIZES.get('default', 4)
+                session.mount("https://", _make_adapter(default_size))
+                session.mount("http://", _make_adapter(default_size))
+
+                for url in (GEMINI_API_URL, GROQ_API_URL):
+                    host = urlsplit(url).netloc
+                    session.mount(_host_prefix(url), _make_adapter(HTTP_POOL_SIZES.get(host, default_size)))
+
+                _session = session
+    return _session
+
+def post(url: str, timeout: float = None, **kwargs) -> requests.Response:
+    """
+    requests.post through the shared session
+    Args:
+        timeout: read timeout in seconds (default HTTP_READ_TIMEOUT; connect timeout is HTTP_CONNECT_TIMEOUT)
+    """
+    timeout = HTTP_READ_TIMEOUT if timeout is None else timeout
+    try:
+        return get_session().post(url, timeout=(HTTP_CONNECT_TIMEOUT, timeout), **kwargs)
+    except requests.exceptions.ConnectionError as e:
+        # With read retries off, urllib3 reports a read timeout as MaxRetryError,
+        # which requests turns into ConnectionError: callers expect a Timeout
+        reason = getattr(e.args[0], 'reason', None) if e.args else None
+        if isinstance(reason, ReadTimeoutError):
+            raise requests.exceptions.ReadTimeout(e, request=e.request) from e
+        raise
+
+def get_connection_stats() -> dict:
+    """
+    Connection reuse counters across all hosts
+    Returns: dict with requests, connections_opened, connections_reused and per-host numbers
+    """
+    stats = {'requests': 0, 'connections_opened': 0, 'connections_reused': 0, 'hosts': {}}
+    if _session is None:
+        return stats
+
+    adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            requests_made = pool.num_requests
+            opened = pool.num_connections
+            stats['requests'] += requests_made
+            stats['connections_opened'] += opened
+            stats['hosts'][pool.host] = {
+                'requests': requests_made,
+                'connections_opened': opened,
+                'connections_reused': max(0, requests_made - opened),
+            }
+
+    stats['connections_reused'] = max(0, stats['requests'] - stats['connections_opened'])
+    return stats
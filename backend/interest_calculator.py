@@ -1,5 +1,6 @@
 from datetime import datetime
-from .sheets import read_all_records
+import numpy as np
+from .record_store import get_store
 
 def calculate_interest(amount, interest_rate, start_date, current_date=None):
     """
@@ -65,64 +66,39 @@ def get_records_with_interest_analysis(default_interest_rate=3.0):
     Returns:
         list of records with interest calculations
     """
-    rows = read_all_records()
+    store = get_store()
     
-    if not rows or len(rows) < 2:
+    if not store.size:
         return []
     
-    # Get headers from first row
-    headers = rows[0]
-    analyzed_records = []
+    # Amounts, rates and dates were parsed once when the store was built;
+    # rows need a date, a numeric amount and a numeric (or NA/empty) rate
+    valid = np.flatnonzero((store.year > 0) & ~np.isnan(store.amount) & store.rate_ok)
     
-    # Process data rows (skip header)
-    for row in rows[1:]:
-        # Pad row with empty strings if needed
-        while len(row) < len(headers):
-            row.append('')
-        
-        # Create record dictionary
-        record = {}
-        for i, header in enumerate(headers):
-            record[header] = row[i] if i < len(row) else ''
+    amount = store.amount[valid]
+    interest_rate = np.where(np.isnan(store.rate[valid]), default_interest_rate, store.rate[valid])
+    
+    # Same arithmetic as calculate_interest, for all records at once
+    now = datetime.now()
+    months_elapsed = (now.year - store.year[valid].astype(np.int64)) * 12 + (now.month - store.month[valid])
+    total_months = months_elapsed + np.maximum(0, (now.day - store.day[valid]) / 30)
+    total_interest = amount * (interest_rate / 100) * total_months
+    
+    analyzed_records = []
+    for j, i in enumerate(valid):
+        # Output rows become DataFrame rows with extra columns, so they are plain dicts
+        record = store.record(i).to_dict()
+        interest_accrued = round(float(total_interest[j]), 2)
         
-        # Skip if no date or amount
-        if not record.get('date') or not record.get('amount'):
-            continue
+        record['calculated_interest'] = interest_accrued
+        record['total_due'] = round(float(amount[j] + total_interest[j]), 2)
+        record['months_elapsed'] = round(float(total_months[j]), 2)
+        record['is_interest_doubled'] = bool(total_interest[j] >= 2 * amount[j])
+        record['interest_exceeds_principal'] = interest_accrued > float(amount[j])
+        record['amount'] = float(amount[j])  # Store parsed amount
+        record['interest'] = float(interest_rate[j])  # Store parsed interest rate
         
-        try:
-            # Parse amount
-            amount_str = str(record['amount']).replace(',', '').strip()
-            if not amount_str:
-                continue
-            amount = float(amount_str)
-            
-            # Get interest rate (use default if NA or empty)
-            interest_str = str(record.get('interest', '')).strip()
-            if not interest_str or interest_str.upper() == 'NA' or interest_str == '':
-                interest_rate = default_interest_rate
-            else:
-                interest_rate = float(interest_str.replace('%', '').strip())
-            
-            # Parse loan date
-            loan_date = record['date']
-            
-            # Calculate interest
-            calc = calculate_interest(amount, interest_rate, loan_date)
-            
-            if calc:
-                # Add calculations to record
-                record['calculated_interest'] = calc['interest_accrued']
-                record['total_due'] = calc['total_amount']
-                record['months_elapsed'] = calc['months_elapsed']
-                record['is_interest_doubled'] = calc['is_doubled']
-                record['interest_exceeds_principal'] = calc['interest_accrued'] > amount
-                record['amount'] = amount  # Store parsed amount
-                record['interest'] = interest_rate  # Store parsed interest rate
-                
-                analyzed_records.append(record)
-        except (ValueError, KeyError, TypeError) as e:
-            # Skip invalid records
-            continue
+        analyzed_records.append(record)
     
     return analyzed_records
 
@@ -0,0 +1,81 @@
+"""
+Key Index - exact and prefix lookups on identifier columns
+Mobile numbers and recordIds are normalized (digits only without the +91 /
+0 prefix, respectively trimmed and lowercased) and kept sorted: an exact key
+is one hash lookup, a prefix is two binary searches over the sorted keys
+(the same walk a digit trie does, without a node per digit).
+"""
+
+import re
+from bisect import bisect_left
+import numpy as np
+
+MOBILE_DIGITS = 10
+
+# Shorter digit strings are too ambiguous (ward numbers, amounts, years) to be
+# taken as a mobile prefix; Indian mobile numbers start with 6-9
+MOBILE_PREFIX_MIN = 5
+MOBILE_FIRST_DIGITS = '6789'
+
+_NON_DIGITS = re.compile(r'\D')
+_MOBILE_QUERY = re.compile(r'^\+?[\d\s-]+$')
+
+def normalize_mobile(value: str) -> str:
+    """Digits of a mobile number, without a leading +91 or 0 ('' if it has none)"""
+    digits = _NON_DIGITS.sub('', value or '')
+    if len(digits) > MOBILE_DIGITS and digits.startswith(('91', '0')):
+        digits = digits[-MOBILE_DIGITS:]
+    return digits
+
+def normalize_record_id(value: str) -> str:
+    return (value or '').strip().lower()
+
+def mobile_query(query: str) -> tuple:
+    """
+    How a query can be answered from the mobile index
+    Returns: ('exact', digits) for a full number, ('prefix', digits) for its
+    leading digits, or None if the query does not look like a mobile number
+    """
+    if not _MOBILE_QUERY.match(query.strip()):
+        return None
+    digits = normalize_mobile(query)
+    if len(digits) == MOBILE_DIGITS:
+        return 'exact', digits
+    if MOBILE_PREFIX_MIN <= len(digits) < MOBILE_DIGITS and digits[0] in MOBILE_FIRST_DIGITS:
+        return 'prefix', digits
+    return None
+
+class KeyIndex:
+    """
+    Positions by normalized key, built once over keys[0..n-1] ('' = no key)
+    With positions given, keys[j] belongs to positions[j] instead, so a
+    position can have several keys. lookup() and prefix() return sorted
+    arrays of distinct positions.
+    """
+
+    def __init__(self, keys: list, positions: list = None):
+        order = sorted((j for j, key in enumerate(keys) if key), key=keys.__getitem__)
+        self._keys = [keys[j] for j in order]
+        self._positions = np.array(order if positions is None else [positions[j] for j in order], dtype=np.int64)
+
+        # Equal keys are adjacent once sorted: key -> (start, stop)
+        self._ranges = {}
+        start = 0
+        for stop in range(1, len(self._keys) + 1):
+            if stop == len(self._keys) or self._keys[stop] != self._keys[start]:
+                self._ranges[self._keys[start]] = (start, stop)
+                start = stop
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, key: str):
+        """Positions whose key equals key"""
+        start, stop = self._ranges.get(key, (0, 0))
+        return np.unique(self._positions[start:stop])
+
+    def prefix(self, prefix: str):
+        """Positions whose key starts with prefix"""
+        start = bisect_left(self._keys, prefix)
+        stop = bisect_left(self._keys, prefix + '\U0010ffff', lo=start)
+        return np.unique(self._positions[start:stop])
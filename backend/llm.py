@@ -2,7 +2,9 @@ import re
 import json
 import streamlit as st
 import requests
-from backend.config import GEMINI_API_KEY, GEMINI_API_URL
+from backend import http_client
+from backend.config import GEMINI_API_KEY, GEMINI_API_URL, GEMINI_RPM, GROQ_RPM, GEMINI_READ_TIMEOUT
+from backend.rate_limit import TokenBucket
 
 
 try:
@@ -11,6 +13,10 @@ except ImportError:
     GROQ_API_KEY = ""
     GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Shared by every session and thread so the process as a whole stays within quota
+_gemini_bucket = TokenBucket.per_minute(GEMINI_RPM, burst=max(1.0, GEMINI_RPM / 4))
+_groq_bucket = TokenBucket.per_minute(GROQ_RPM, burst=max(1.0, GROQ_RPM / 4))
+
 
 EXTRACTION_PROMPT = """
 आप एक डेटा एक्सट्रैक्शन सहायक हैं। 
@@ -103,7 +109,8 @@ def call_groq(prompt: str, context: str = "") -> dict:
     }
 
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        _groq_bucket.acquire()
+        response = http_client.post(GROQ_API_URL, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         
@@ -146,7 +153,8 @@ def call_gemini(prompt: str, context: str = "") -> dict:
     }
 
     try:
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload, timeout=90)
+        _gemini_bucket.acquire()
+        response = http_client.post(GEMINI_API_URL, headers=headers, json=payload, timeout=GEMINI_READ_TIMEOUT)
         response.raise_for_status()
         result = response.json()
         
@@ -205,7 +213,8 @@ def call_groq_simple(prompt: str) -> str:
     }
     
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
+        _groq_bucket.acquire()
+        response = http_client.post(GROQ_API_URL, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         
@@ -232,7 +241,8 @@ def call_gemini_simple(prompt: str) -> str:
     }
     
     try:
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload, timeout=30)
+        _gemini_bucket.acquire()
+        response = http_client.post(GEMINI_API_URL, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         
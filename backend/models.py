@@ -0,0 +1,97 @@
+"""
+Models - compact, immutable record type for ledger rows
+A LoanRecord stores its fields in __slots__ instead of a per-row dict, is
+built once per data version by the RecordStore and shared by every search
+and page that shows it.
+"""
+
+from datetime import date
+from backend.sheets import HEADERS
+
+class LoanRecord:
+    """
+    One ledger row (read-only)
+    Sheet cells are attributes named after the headers (recordId, date, nameHindi,
+    ..., loanStatus), as strings with '' for missing cells. Parsed values sit
+    alongside: principal (float or None), rate (monthly % or None when blank/NA/
+    invalid), loan_date (datetime.date or None) and the sheet row_number.
+
+    Also supports read-only dict-style access to the sheet cells and row_number
+    (record['nameHindi'], record.get('mobile', 'N/A')), like the row dicts
+    the pages used before.
+    """
+
+    FIELDS = tuple(HEADERS)
+    KEYS = FIELDS + ('row_number',)
+    __slots__ = KEYS + ('principal', 'rate', 'loan_date')
+
+    def __init__(self, cells, row_number: int, principal: float = None, rate: float = None,
+                 loan_date: date = None):
+        """
+        Args:
+            cells: cell values in HEADERS order; shorter rows are padded with ''
+        """
+        values = tuple(cells)
+        if len(values) < len(self.FIELDS):
+            values += ('',) * (len(self.FIELDS) - len(values))
+        values = values[:len(self.FIELDS)] + (row_number, principal, rate, loan_date)
+
+        # Slot descriptors write directly, bypassing the read-only __setattr__
+        for setter, value in zip(_SETTERS, values):
+            setter(self, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LoanRecord is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("LoanRecord is immutable")
+
+    def __getitem__(self, key):
+        if key in _KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _KEYS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def cells(self) -> tuple:
+        """Sheet cell values in HEADERS order"""
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def to_dict(self) -> dict:
+        """Plain dict of the sheet cells plus row_number (a new dict on every call)"""
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def replace(self, **changes) -> 'LoanRecord':
+        """Copy with some sheet cells changed, e.g. record.replace(loanStatus='Closed')"""
+        unknown = set(changes) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown LoanRecord fields: {', '.join(sorted(unknown))}")
+        cells = [changes.get(name, getattr(self, name)) for name in self.FIELDS]
+        return LoanRecord(cells, self.row_number, self.principal, self.rate, self.loan_date)
+
+    def _state(self) -> tuple:
+        return self.cells() + (self.row_number,)
+
+    def __eq__(self, other):
+        if not isinstance(other, LoanRecord):
+            return NotImplemented
+        return self._state() == other._state()
+
+    def __hash__(self):
+        return hash(self._state())
+
+    def __reduce__(self):
+        return (LoanRecord, (self.cells(), self.row_number, self.principal, self.rate, self.loan_date))
+
+    def __repr__(self):
+        return f"LoanRecord(row_number={self.row_number}, recordId={self.recordId!r}, loanStatus={self.loanStatus!r})"
+
+_KEYS = frozenset(LoanRecord.KEYS)
+_SETTERS = tuple(LoanRecord.__dict__[name].__set__ for name in LoanRecord.__slots__)
@@ -0,0 +1,95 @@
+"""
+Phonetic - script-independent sound keys for Hindi names
+"राम लाल", "Ram Lal", "Ramlal" and "Raam Laal" all get the key "rml": both
+scripts are reduced to one consonant skeleton. Devanagari letters are
+transliterated one by one; romanized text has its digraphs folded first
+(sh, kh, chh, ph, ...). Then aspirated and plain, retroflex and dental, and
+commonly confused sounds (s/sh/ṣ, v/w/b, j/z, ph/f) share a letter, vowels
+are dropped except for a leading one (marked 'a') and repeats are collapsed.
+"""
+
+import re
+import unicodedata
+
+# Shorter keys are too common to match by prefix ("rm" starts half the Rams)
+PREFIX_MIN = 3
+
+# Devanagari consonants and nasal/r signs -> skeleton letter
+_DEVANAGARI_CONSONANTS = {
+    'क': 'k', 'ख': 'k', 'ग': 'g', 'घ': 'g', 'ङ': 'n',
+    'च': 'c', 'छ': 'c', 'ज': 'j', 'झ': 'j', 'ञ': 'n',
+    'ट': 't', 'ठ': 't', 'ड': 'd', 'ढ': 'd', 'ण': 'n',
+    'त': 't', 'थ': 't', 'द': 'd', 'ध': 'd', 'न': 'n',
+    'प': 'p', 'फ': 'p', 'ब': 'b', 'भ': 'b', 'म': 'm',
+    'य': 'y', 'र': 'r', 'ल': 'l', 'ळ': 'l', 'व': 'b',
+    'श': 's', 'ष': 's', 'स': 's', 'ह': 'h',
+    'ं': 'n', 'ँ': 'n', 'ः': 'h', 'ृ': 'r', 'ऋ': 'r',
+}
+_DEVANAGARI_VOWELS = set('अआइईउऊएऐओऔऑ')
+
+# Applied after NFD, which splits nukta letters into base + U+093C: ड़/ढ़ sound
+# like r, the other nukta letters like their base; ज्ञ is said "gy"
+_DEVANAGARI_REWRITES = (
+    ('\u0921\u093c', '\u0930'), ('\u0922\u093c', '\u0930'), ('\u093c', ''),
+    ('\u091c\u094d\u091e', '\u0917\u092f'),
+)
+
+# Romanized spellings folded in this order (longest first); a c that does not
+# start ch/chh is a k sound
+_ROMAN_REWRITES = (
+    ('ck', 'k'), ('ksh', 'ks'), ('x', 'ks'), ('ngh', 'nh'), ('chh', 'C'), ('ch', 'C'),
+    ('c', 'k'), ('C', 'c'), ('sh', 's'), ('kh', 'k'), ('gh', 'g'), ('jh', 'j'),
+    ('th', 't'), ('dh', 'd'), ('ph', 'p'), ('bh', 'b'), ('rh', 'r'), ('q', 'k'),
+    ('f', 'p'), ('z', 'j'), ('w', 'b'), ('v', 'b'),
+)
+_ROMAN_VOWELS = set('aeiou')
+
+_DEVANAGARI = re.compile(r'[ऀ-ॿ]')
+_ROMAN_LETTERS = re.compile(r'[^a-z]')
+_REPEATS = re.compile(r'(.)\1+')
+
+def _devanagari_skeleton(word: str) -> str:
+    word = unicodedata.normalize('NFD', word)
+    for old, new in _DEVANAGARI_REWRITES:
+        word = word.replace(old, new)
+    letters = ['a'] if word[:1] in _DEVANAGARI_VOWELS else []
+    letters.extend(_DEVANAGARI_CONSONANTS.get(char, '') for char in word)
+    return ''.join(letters)
+
+def _roman_skeleton(word: str) -> str:
+    word = _ROMAN_LETTERS.sub('', word.lower())
+    if not word:
+        return ''
+    for old, new in _ROMAN_REWRITES:
+        word = word.replace(old, new)
+    letters = ['a'] if word[0] in _ROMAN_VOWELS else []
+    letters.extend(char for char in word if char not in _ROMAN_VOWELS)
+    return ''.join(letters)
+
+def looks_like_name(text: str) -> bool:
+    """
+    True for text that can be a name: it has letters and no digits or '_'
+    (recordIds such as Ram_16092020_0002 and mobile numbers never qualify,
+    whole or in part, since their key would be just the name's letters)
+    """
+    text = text or ''
+    return any(char.isalpha() for char in text) and not any(char.isdigit() or char == '_' for char in text)
+
+def phonetic_key(text: str) -> str:
+    """
+    Sound key of a name or word in Devanagari or romanized Hindi ('' if none)
+    Words are joined, so "Ram Lal" and "Ramlal" share a key.
+    """
+    skeleton = ''.join(
+        _devanagari_skeleton(word) if _DEVANAGARI.search(word) else _roman_skeleton(word)
+        for word in (text or '').split()
+    )
+    return _REPEATS.sub(r'\1', skeleton)
+
+def name_keys(text: str) -> list:
+    """Distinct keys a name is indexed under: the whole name, then each of its words"""
+    keys = [phonetic_key(text)]
+    words = (text or '').split()
+    if len(words) > 1:
+        keys.extend(phonetic_key(word) for word in words)
+    return list(dict.fromkeys(key for key in keys if key))
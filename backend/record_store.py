@@ -0,0 +1,534 @@
+"""
+Record Store - typed, columnar snapshot of the ledger
+Built once per data version and shared by analytics, interest calculations,
+search and storage: amounts, interest, dates and loan status are parsed a
+single time into NumPy arrays, and text cells are kept as interned string
+columns (repeated values such as ward, place or status share one object).
+
+Records are also partitioned by loan status, so active-only work never
+walks the closed history. The store follows the replica: a delta sync or a
+status write derives the next store by parsing only the appended rows and
+moving changed records between partitions.
+
+Trigram indexes for substring search are built per field group on first
+use and carried over to derived stores, where only appended rows and
+changed statuses are indexed. BM25 indexes for ranked search are built the
+same way but, as their statistics span all rows, are only carried over
+while their text is unchanged. So are the exact/prefix indexes on mobile
+numbers and recordIds that answer identifier queries without a scan, and
+the phonetic index that matches names across Devanagari and romanized
+spellings.
+"""
+
+import sys
+import copy
+import math
+import threading
+from datetime import datetime, date
+import numpy as np
+from backend.sheets import HEADERS
+from backend.models import LoanRecord
+from backend.text_index import TrigramIndex
+from backend.bm25 import BM25Index
+from backend.key_index import KeyIndex, normalize_mobile, normalize_record_id, mobile_query
+from backend.phonetic import name_keys, phonetic_key, looks_like_name, PREFIX_MIN
+from backend.replica import get_records, add_listener
+
+COLUMN = {name: i for i, name in enumerate(HEADERS)}
+STATUS_COLUMN = COLUMN['loanStatus']
+
+STATUS_ACTIVE = 0
+STATUS_CLOSED = 1
+STATUS_OTHER = 2
+STATUS_BLANK = 3
+STATUS_CODES = {'Active': STATUS_ACTIVE, 'Closed': STATUS_CLOSED, '': STATUS_BLANK}
+STATUS_NAMES = {STATUS_ACTIVE: 'active', STATUS_CLOSED: 'closed', STATUS_OTHER: 'other', STATUS_BLANK: 'blank'}
+
+# Field groups with a substring index: name -> (separator, fields).
+# 'all' covers every cell of the row. Fields joined with '\x1f' are matched
+# one by one, so a query cannot span them.
+TEXT_INDEX_FIELDS = {
+    'quick': (' ', ('recordId', 'nameHindi', 'nameEnglish', 'addressHindi',
+                    'addressEnglish', 'wardArea', 'mobile', 'relationship')),
+    'name': ('\x1f', ('nameHindi', 'nameEnglish')),
+    'ward': ('\x1f', ('wardArea',)),
+    'mobile': ('\x1f', ('mobile',)),
+    'recordId': ('\x1f', ('recordId',)),
+    'all': (' ', None),
+}
+
+# Precomputed per-record search text: name -> (separator, fields, lowercase).
+# Every indexed group above is available lowercased; 'semantic' is the text
+# Smart Search embeds, so it keeps its original case; 'deep' is what Deep
+# Search ranks its LLM shortlist by.
+SEARCH_TEXT_FIELDS = {name: (separator, fields, True) for name, (separator, fields) in TEXT_INDEX_FIELDS.items()}
+SEARCH_TEXT_FIELDS['semantic'] = (' ', ('recordId', 'nameHindi', 'nameEnglish', 'addressHindi', 'addressEnglish',
+                                        'wardArea', 'mobile', 'date', 'amount', 'relationship'), False)
+SEARCH_TEXT_FIELDS['deep'] = (' ', ('recordId', 'nameHindi', 'nameEnglish', 'addressHindi', 'addressEnglish',
+                                    'wardArea', 'mobile', 'amount', 'relationship'), True)
+
+# Identifier columns with a KeyIndex: name -> normalizer
+KEY_FIELDS = {'mobile': normalize_mobile, 'recordId': normalize_record_id}
+
+# Columns whose values are indexed by phonetic key (see backend/phonetic.py)
+PHONETIC_FIELDS = ('nameHindi', 'nameEnglish')
+
+_lock = threading.Lock()
+_store = None
+_builds = 0
+_no_rows = []
+
+def parse_date(date_str):
+    """Parse date string (YYYY-MM-DD or DD/MM/YYYY) to datetime object, None if invalid"""
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d')
+    except:
+        try:
+            return datetime.strptime(date_str, '%d/%m/%Y')
+        except:
+            return None
+
+def parse_amount(amount_str):
+    """Convert amount string to float (0.0 if invalid)"""
+    value = _to_float(amount_str)
+    return 0.0 if math.isnan(value) else value
+
+def _to_float(text) -> float:
+    try:
+        return float(str(text).replace(',', '').strip())
+    except:
+        return math.nan
+
+def _to_rate(text) -> tuple:
+    """(rate, valid); rate is NaN when blank or 'NA' so callers can apply their default"""
+    text = str(text).strip()
+    if not text or text.upper() == 'NA':
+        return math.nan, True
+    try:
+        return float(text.replace('%', '').strip()), True
+    except ValueError:
+        return math.nan, False
+
+def _to_date_parts(text) -> tuple:
+    dt = parse_date(text)
+    if dt is None:
+        return 0, 0, 0, 0
+    return dt.toordinal(), dt.year, dt.month, dt.day
+
+def _parse_column(values: list, parse) -> list:
+    # Dates, amounts and rates repeat a lot; parse each distinct string once
+    cache = {}
+    parsed = []
+    for value in values:
+        result = cache.get(value)
+        if result is None:
+            result = cache[value] = parse(value)
+        parsed.append(result)
+    return parsed
+
+class RecordStore:
+    """
+    Read-only columnar view of the ledger rows
+    Data rows are addressed by position i (0 = first row under the header);
+    the matching sheet row is row_numbers[i]. Cells missing from short rows
+    read as '' in the text columns.
+
+    Numeric columns (NumPy):
+        amount         float64, NaN where the cell is not a number
+        interest       float64, the interest cell as a plain number (NaN if not one)
+        rate, rate_ok  monthly rate in % (NaN when blank/NA) and whether the cell parsed
+        date_ordinal   int32 proleptic ordinal, 0 where the date is invalid
+        year, month, day   int16 date parts, 0 where the date is invalid
+        status         int8 STATUS_ACTIVE / STATUS_CLOSED / STATUS_OTHER / STATUS_BLANK
+        row_width      int16 number of cells the sheet returned for the row
+
+    Partitions (sorted position arrays):
+        partitions[status]  positions with that status code
+        open_positions      every position that is not Closed (what search covers)
+
+    Search text (lists of str, built on first use):
+        search_text(name)   the SEARCH_TEXT_FIELDS group of every record joined into one string
+    """
+
+    def __init__(self, rows: list, version: int = 0):
+        self.version = version
+        self.source = rows
+        self.headers = list(rows[0]) if rows else list(HEADERS)
+        self.rows = rows[1:] if rows else []
+        self.size = n = len(self.rows)
+
+        self.row_numbers = np.arange(2, n + 2, dtype=np.int32)
+        self.row_width = np.fromiter((len(row) for row in self.rows), dtype=np.int16, count=n)
+
+        width = max(len(self.headers), len(HEADERS))
+        self.text = [
+            [sys.intern(str(row[pos])) if len(row) > pos else '' for row in self.rows]
+            for pos in range(width)
+        ]
+
+        self.amount = np.array(_parse_column(self.text[COLUMN['amount']], _to_float), dtype=np.float64)
+        self.interest = np.array(_parse_column(self.text[COLUMN['interest']], _to_float), dtype=np.float64)
+
+        rates = _parse_column(self.text[COLUMN['interest']], _to_rate)
+        self.rate = np.array([rate for rate, _ in rates], dtype=np.float64)
+        self.rate_ok = np.array([ok for _, ok in rates], dtype=bool)
+
+        dates = np.array(_parse_column(self.text[COLUMN['date']], _to_date_parts), dtype=np.int32).reshape(n, 4)
+        self.date_ordinal = dates[:, 0]
+        self.year = dates[:, 1].astype(np.int16)
+        self.month = dates[:, 2].astype(np.int16)
+        self.day = dates[:, 3].astype(np.int16)
+
+        self.status = np.fromiter(
+            (STATUS_CODES.get(value, STATUS_OTHER) for value in self.text[STATUS_COLUMN]),
+            dtype=np.int8, count=n
+        )
+
+        self.partitions = {code: np.flatnonzero(self.status == code) for code in STATUS_NAMES}
+        self.open_positions = np.flatnonzero(self.status != STATUS_CLOSED)
+
+        self._categories = {}
+        self._records = [None] * n
+        self._row_numbers = self.row_numbers.tolist()
+        self._parsed = None
+        self._search_texts = {}
+        self._text_indexes = {}
+        self._bm25_indexes = {}
+        self._key_indexes = {}
+        self._index_lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def positions(self, status: int):
+        """Sorted positions of the records with a status code"""
+        return self.partitions[status]
+
+    def counts(self) -> dict:
+        """Number of records per status: {'active', 'closed', 'other', 'blank'}"""
+        return {name: len(self.partitions[code]) for code, name in STATUS_NAMES.items()}
+
+    def column(self, name: str) -> list:
+        """Text column by header name"""
+        return self.text[COLUMN[name]]
+
+    def categories(self, name: str) -> tuple:
+        """
+        Dictionary-encode a text column (computed once per store)
+        Returns: (labels, codes) with labels[codes[i]] == column(name)[i]
+        """
+        if name not in self._categories:
+            index = {}
+            codes = np.fromiter(
+                (index.setdefault(value, len(index)) for value in self.column(name)),
+                dtype=np.int32, count=self.size
+            )
+            self._categories[name] = (list(index), codes)
+        return self._categories[name]
+
+    def record(self, i: int) -> LoanRecord:
+        """LoanRecord at position i, created on first access and shared afterwards"""
+        record = self._records[i]
+        if record is None:
+            if self._parsed is None:
+                self._parsed = self._parsed_values()
+            principal, rate, loan_date = self._parsed
+            record = self._records[i] = LoanRecord(
+                [column[i] for column in self.text[:len(HEADERS)]],
+                self._row_numbers[i], principal[i], rate[i], loan_date[i]
+            )
+        return record
+
+    def _parsed_values(self) -> tuple:
+        """Python-level parsed values for LoanRecord: (principal, rate, loan_date) lists"""
+        dates = {}
+        for ordinal in set(self.date_ordinal.tolist()):
+            dates[ordinal] = date.fromordinal(ordinal) if ordinal else None
+        return (
+            [None if math.isnan(value) else value for value in self.amount.tolist()],
+            [None if math.isnan(value) else value for value in self.rate.tolist()],
+            [dates[ordinal] for ordinal in self.date_ordinal.tolist()],
+        )
+
+    def records(self, indices) -> list:
+        return [self.record(int(i)) for i in indices]
+
+    def _build_search_text(self, name: str, positions) -> list:
+        separator, fields, lowercase = SEARCH_TEXT_FIELDS[name]
+        if fields is None:
+            texts = [separator.join(map(str, self.rows[i])) for i in positions]
+        else:
+            columns = [self.text[COLUMN[field]] for field in fields]
+            texts = [separator.join([column[i] for column in columns]) for i in positions]
+        return [text.lower() for text in texts] if lowercase else texts
+
+    def search_text(self, name: str) -> list:
+        """
+        Text of a SEARCH_TEXT_FIELDS group for every position
+        Built once per store (i.e. per data version) and kept up to date by
+        _derive, so searches compare against it instead of re-joining fields.
+        """
+        texts = self._search_texts.get(name)
+        if texts is None:
+            with self._index_lock:
+                texts = self._search_texts.get(name)
+                if texts is None:
+                    texts = self._search_texts[name] = self._build_search_text(name, range(self.size))
+        return texts
+
+    def text_index(self, name: str) -> TrigramIndex:
+        """Trigram index over a TEXT_INDEX_FIELDS group, built on first use"""
+        index = self._text_indexes.get(name)
+        if index is None:
+            texts = self.search_text(name)
+            with self._index_lock:
+                index = self._text_indexes.get(name)
+                if index is None:
+                    index = TrigramIndex(texts)
+                    self._text_indexes[name] = index
+        return index
+
+    def bm25_index(self, name: str) -> BM25Index:
+        """BM25 index over a TEXT_INDEX_FIELDS group, built on first use"""
+        index = self._bm25_indexes.get(name)
+        if index is None:
+            texts = self.search_text(name)
+            with self._index_lock:
+                index = self._bm25_indexes.get(name)
+                if index is None:
+                    index = self._bm25_indexes[name] = BM25Index(texts)
+        return index
+
+    def key_index(self, name: str) -> KeyIndex:
+        """Exact/prefix index over a KEY_FIELDS column, built on first use"""
+        index = self._key_indexes.get(name)
+        if index is None:
+            with self._index_lock:
+                index = self._key_indexes.get(name)
+                if index is None:
+                    normalize = KEY_FIELDS[name]
+                    index = self._key_indexes[name] = KeyIndex([normalize(value) for value in self.column(name)])
+        return index
+
+    def phonetic_index(self) -> KeyIndex:
+        """
+        Index from phonetic key to positions over PHONETIC_FIELDS, built on first use
+        Every name is indexed under its whole-name key and under each word's key.
+        """
+        index = self._key_indexes.get('phonetic')
+        if index is None:
+            with self._index_lock:
+                index = self._key_indexes.get('phonetic')
+                if index is None:
+                    keys, positions, cache = [], [], {}
+                    for name in PHONETIC_FIELDS:
+                        for i, value in enumerate(self.column(name)):
+                            value_keys = cache.get(value)
+                            if value_keys is None:
+                                value_keys = cache[value] = name_keys(value)
+                            keys.extend(value_keys)
+                            positions.extend([i] * len(value_keys))
+                    index = self._key_indexes['phonetic'] = KeyIndex(keys, positions)
+        return index
+
+    def phonetic_positions(self, query: str):
+        """
+        Positions whose name sounds like query, in either script
+        Whole names and single words match by key; if none does, keys starting
+        with the query's key (at least PREFIX_MIN letters) are taken instead.
+        Queries that are not name-like (see looks_like_name) match nothing.
+        Returns: sorted int array (empty if nothing matched)
+        """
+        key = phonetic_key(query) if looks_like_name(query) else ''
+        if not key:
+            return np.empty(0, dtype=np.int64)
+        index = self.phonetic_index()
+        positions = index.lookup(key)
+        if not len(positions) and len(key) >= PREFIX_MIN:
+            positions = index.prefix(key)
+        return positions
+
+    def key_positions(self, query: str, fields: tuple = ('mobile', 'recordId'), prefix: bool = True):
+        """
+        Positions found by looking query up as an identifier
+        A recordId or a full mobile number (any formatting, +91 optional) is
+        matched exactly; 5-9 leading digits of a mobile number as a prefix,
+        unless prefix is False.
+        Returns: sorted int array, or None when the query is not an identifier
+        of these fields or nothing matched (callers then fall back to a scan)
+        """
+        hits = []
+        if 'recordId' in fields:
+            hits.append(self.key_index('recordId').lookup(normalize_record_id(query)))
+        if 'mobile' in fields:
+            mobile = mobile_query(query)
+            if mobile is not None and (prefix or mobile[0] == 'exact'):
+                kind, digits = mobile
+                index = self.key_index('mobile')
+                hits.append(index.lookup(digits) if kind == 'exact' else index.prefix(digits))
+
+        positions = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+        return positions if len(positions) else None
+
+    def text_candidates(self, name: str, query: str):
+        """
+        Positions whose TEXT_INDEX_FIELDS group may contain the lowercased query
+        Returns: sorted int array (a superset; verify each one), or None when the
+        query is shorter than a trigram and every position has to be checked
+        """
+        candidates = self.text_index(name).candidates(query)
+        if candidates is None:
+            return None
+        # A shared index may already hold rows appended after this store was built
+        return candidates[candidates < self.size]
+
+    def _derive(self, rows: list, statuses: dict, appended: list, version: int) -> 'RecordStore':
+        """
+        Store for rows that differ from this one's only by appended rows and
+        status changes; this store is left untouched for readers still using it
+        """
+        store = copy.copy(self)
+        store.version = version
+        store.source = rows
+        store.rows = rows[1:]
+        store._index_lock = threading.Lock()
+
+        with self._index_lock:
+            search_texts = dict(self._search_texts)
+            store._text_indexes = dict(self._text_indexes)
+            bm25_indexes = dict(self._bm25_indexes)
+            key_indexes = dict(self._key_indexes)
+
+        if appended:
+            store._append(RecordStore([self.headers] + appended))
+        if statuses:
+            store._set_statuses(statuses)
+
+        # Search text is extended for the new rows and re-joined where a status
+        # it includes changed; the lists of this store are never modified
+        store._search_texts = {}
+        status_changed = sorted(statuses)
+        for name, texts in search_texts.items():
+            fields = SEARCH_TEXT_FIELDS[name][1]
+            texts = texts + store._build_search_text(name, range(self.size, store.size))
+            if fields is None or 'loanStatus' in fields:
+                for i, text in zip(status_changed, store._build_search_text(name, status_changed)):
+                    texts[i] = text
+            store._search_texts[name] = texts
+
+        # Indexes are shared with this store; they only gain postings, which
+        # its readers filter out by verifying candidates against their own text
+        for name, index in store._text_indexes.items():
+            changed = list(range(self.size, store.size))
+            if TEXT_INDEX_FIELDS[name][1] is None or 'loanStatus' in TEXT_INDEX_FIELDS[name][1]:
+                changed = status_changed + changed
+            texts = store.search_text(name)
+            index.add(changed, [texts[i] for i in changed])
+
+        # Key and name columns never change in place
+        store._key_indexes = {} if appended else key_indexes
+
+        store._bm25_indexes = {}
+        if not appended:
+            for name, index in bm25_indexes.items():
+                fields = TEXT_INDEX_FIELDS[name][1]
+                if not statuses or (fields is not None and 'loanStatus' not in fields):
+                    store._bm25_indexes[name] = index
+        return store
+
+    def _append(self, tail: 'RecordStore'):
+        offset = self.size
+        self.size += tail.size
+
+        for name in ('row_width', 'amount', 'interest', 'rate', 'rate_ok',
+                     'date_ordinal', 'year', 'month', 'day', 'status'):
+            setattr(self, name, np.concatenate([getattr(self, name), getattr(tail, name)]))
+        self.row_numbers = np.concatenate([self.row_numbers, tail.row_numbers + offset])
+        self.text = [column + tail_column for column, tail_column in zip(self.text, tail.text)]
+
+        self.partitions = {
+            code: np.concatenate([positions, tail.partitions[code] + offset])
+            for code, positions in self.partitions.items()
+        }
+        self.open_positions = np.concatenate([self.open_positions, tail.open_positions + offset])
+
+        self._categories = {}
+        self._records = self._records + tail._records
+        self._row_numbers = self._row_numbers + [row_number + offset for row_number in tail._row_numbers]
+        if self._parsed is not None:
+            self._parsed = tuple(mine + theirs for mine, theirs in zip(self._parsed, tail._parsed_values()))
+
+    def _set_statuses(self, statuses: dict):
+        # Copy what changes; the arrays of the previous store stay as they were
+        self.status = self.status.copy()
+        self.row_width = self.row_width.copy()
+        self.text = list(self.text)
+        column = self.text[STATUS_COLUMN] = list(self.text[STATUS_COLUMN])
+        self._records = list(self._records)
+        self._categories = {name: value for name, value in self._categories.items() if name != 'loanStatus'}
+
+        partitions = dict(self.partitions)
+        open_positions = self.open_positions
+
+        for i, value in statuses.items():
+            old, new = int(self.status[i]), STATUS_CODES.get(value, STATUS_OTHER)
+            column[i] = sys.intern(value)
+            self.status[i] = new
+            self.row_width[i] = len(self.rows[i])
+            if self._records[i] is not None:
+                self._records[i] = self._records[i].replace(loanStatus=value)
+
+            if old != new:
+                partitions[old] = _remove_position(partitions[old], i)
+                partitions[new] = _insert_position(partitions[new], i)
+                if old == STATUS_CLOSED:
+                    open_positions = _insert_position(open_positions, i)
+                elif new == STATUS_CLOSED:
+                    open_positions = _remove_position(open_positions, i)
+
+        self.partitions = partitions
+        self.open_positions = open_positions
+
+def _insert_position(positions, i: int):
+    return np.insert(positions, np.searchsorted(positions, i), i)
+
+def _remove_position(positions, i: int):
+    j = np.searchsorted(positions, i)
+    if j < len(positions) and positions[j] == i:
+        return np.delete(positions, j)
+    return positions
+
+def _follow_replica(previous_rows: list, rows: list, statuses: dict, appended: list):
+    global _store, _builds
+    with _lock:
+        if _store is not None and _store.source is previous_rows:
+            _builds += 1
+            _store = _store._derive(rows, statuses, appended, _builds)
+
+add_listener(_follow_replica)
+
+def as_store(records) -> RecordStore:
+    """
+    RecordStore for a list of rows (including header), built once per list
+    Passing a RecordStore returns it unchanged. The rows must not be modified
+    after the store is built; replica snapshots never are.
+    """
+    global _store, _builds
+
+    if isinstance(records, RecordStore):
+        return records
+
+    records = records or _no_rows
+    store = _store
+    if store is not None and store.source is records:
+        return store
+
+    with _lock:
+        if _store is None or _store.source is not records:
+            _builds += 1
+            _store = RecordStore(records, version=_builds)
+        return _store
+
+def get_store(max_age: float = None) -> RecordStore:
+    """RecordStore over the current replica snapshot"""
+    return as_store(get_records(max_age))
@@ -0,0 +1,204 @@
+"""
+Record Replica - process-wide read-through copy of Sheet1
+All sessions and pages read the ledger from here instead of downloading the
+whole sheet on every rerun. The copy is refreshed after RECORDS_TTL_SECONDS,
+or right away after the app itself writes to the sheet.
+
+Refreshes are incremental: rows are only ever appended and loanStatus is the
+only column edited in place, so a sync fetches the new tail rows plus the
+status column and merges them. A full re-read happens on first load, every
+RECORDS_FULL_SYNC_SECONDS, and whenever the sheet no longer lines up with
+the copy (rows deleted or reordered). Status changes made by this app are
+applied to the copy directly (write-through), and derived structures such
+as the RecordStore follow both kinds of change through listeners instead
+of being rebuilt.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+import streamlit as st
+from backend.config import RECORDS_TTL_SECONDS, RECORDS_FULL_SYNC_SECONDS
+from backend.sheets import fetch_all_rows, fetch_rows_since
+
+STATUS_COLUMN = 14
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_rows = None
+# Digest of _rows, None until a full sync needs it (delta syncs and status writes reset it)
+_digest = None
+_version = 0
+_loaded_at = 0.0
+_full_loaded_at = 0.0
+_stale = True
+_invalidations = 0
+_listeners = []
+
+def _rows_digest(rows: list) -> str:
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _is_fresh(max_age: float) -> bool:
+    return not _stale and time.monotonic() - _loaded_at < max_age
+
+def _with_status(row: list, status: str) -> list:
+    padded = row[:STATUS_COLUMN] + [''] * (STATUS_COLUMN - len(row))
+    return padded + [status] + row[STATUS_COLUMN + 1:] if status else padded
+
+def _notify(previous_rows: list, rows: list, statuses: dict, appended: list):
+    for listener in list(_listeners):
+        try:
+            listener(previous_rows, rows, statuses, appended)
+        except Exception:
+            # A listener that cannot follow the change rebuilds from the rows later
+            logger.exception("Replica listener %r failed to follow a change", listener)
+
+def add_listener(listener):
+    """
+    Follow incremental changes to the rows
+    listener(previous_rows, rows, statuses, appended) is called whenever a delta
+    sync or a status write replaces previous_rows with rows. statuses maps
+    data-row positions (0 = first row under the header) to their new loanStatus,
+    appended holds the new tail rows. Full re-reads are not reported.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def _full_sync():
+    global _rows, _digest, _version, _full_loaded_at
+
+    rows = fetch_all_rows()
+    digest = _rows_digest(rows)
+    # Rows patched since the last full read are compared as they are now. An
+    # unchanged sheet keeps the rows object and version, and with them the
+    # RecordStore (built per rows object), its indexes and the search caches
+    if _digest is None and _rows:
+        _digest = _rows_digest(_rows)
+    if digest != _digest:
+        _version += 1
+        _digest = digest
+        _rows = rows
+    _full_loaded_at = time.monotonic()
+
+def _delta_sync():
+    global _rows, _digest, _version
+
+    delta = fetch_rows_since(len(_rows))
+
+    last_row = _rows[-1]
+    if delta['last_record_id'] != (last_row[0] if last_row else ''):
+        _full_sync()
+        return
+
+    # Never modify rows in place: other sessions may be iterating them
+    new_rows = None
+    changed = {}
+    for i, status in enumerate(delta['statuses'], start=1):
+        row = _rows[i]
+        current = row[STATUS_COLUMN] if len(row) > STATUS_COLUMN else ''
+        if current != status:
+            if new_rows is None:
+                new_rows = list(_rows)
+            new_rows[i] = _with_status(row, status)
+            changed[i - 1] = status
+
+    if delta['tail']:
+        if new_rows is None:
+            new_rows = list(_rows)
+        new_rows.extend(delta['tail'])
+
+    if new_rows is not None:
+        _notify(_rows, new_rows, changed, delta['tail'])
+        _rows = new_rows
+        _version += 1
+        _digest = None
+
+def get_snapshot(max_age: float = None):
+    """
+    Current ledger rows and their version
+    Args:
+        max_age: seconds a cached copy may be served (default RECORDS_TTL_SECONDS)
+    Returns: (rows including header, version); the version changes whenever the rows do
+    Note: rows are shared between sessions and must not be modified
+    """
+    global _loaded_at, _stale
+    max_age = RECORDS_TTL_SECONDS if max_age is None else max_age
+
+    if _is_fresh(max_age):
+        return _rows, _version
+
+    # Holding the lock while syncing makes concurrent sessions share one read
+    with _lock:
+        if _is_fresh(max_age):
+            return _rows, _version
+
+        # A write that lands while we sync keeps the copy stale
+        invalidations_before = _invalidations
+
+        try:
+            if not _rows or time.monotonic() - _full_loaded_at >= RECORDS_FULL_SYNC_SECONDS:
+                _full_sync()
+            else:
+                _delta_sync()
+        except Exception as e:
+            if _rows is not None:
+                st.warning(f"⚠️ Could not refresh records, showing cached data: {e}")
+                return _rows, _version
+            st.error(f"❌ Error reading from Google Sheets: {e}")
+            return [], _version
+
+        _loaded_at = time.monotonic()
+        _stale = invalidations_before != _invalidations
+
+        return _rows, _version
+
+def get_records(max_age: float = None) -> list:
+    """Ledger rows including header (see get_snapshot)"""
+    rows, _ = get_snapshot(max_age)
+    return rows
+
+def get_row_count() -> int:
+    """Rows (including header) in the copy held now, without syncing (0 before the first load)"""
+    return len(_rows) if _rows else 0
+
+def get_version() -> int:
+    """Version of the rows currently held (0 before the first load)"""
+    return _version
+
+def apply_statuses(statuses: dict):
+    """
+    Write-through for loanStatus edits this app has just saved to the sheet
+    Args:
+        statuses: {sheet row_number: new status}
+    Patches the copy (and its listeners) instead of forcing a re-sync; falls
+    back to invalidate() when the copy is not loaded or lacks those rows.
+    """
+    global _rows, _digest, _version
+
+    with _lock:
+        if not _rows or any(not 2 <= row_number <= len(_rows) for row_number in statuses):
+            invalidate()
+            return
+
+        new_rows = list(_rows)
+        changed = {}
+        for row_number, status in statuses.items():
+            row = _rows[row_number - 1]
+            if (row[STATUS_COLUMN] if len(row) > STATUS_COLUMN else '') != status:
+                new_rows[row_number - 1] = _with_status(row, status)
+                changed[row_number - 2] = status
+
+        if changed:
+            _notify(_rows, new_rows, changed, [])
+            _rows = new_rows
+            _version += 1
+            _digest = None
+
+def invalidate():
+    """Force the next read to sync with Google Sheets (call after writes not covered by apply_statuses)"""
+    global _stale, _invalidations
+    _invalidations += 1
+    _stale = True
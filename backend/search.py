@@ -1,146 +1,426 @@
+import os
 import json
-import streamlit as st
+import threading
+from collections import OrderedDict
 import numpy as np
-from backend.embeddings import get_embedding
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import streamlit as st
+from backend.embeddings import get_embedding, get_record_embeddings
+from backend.embedding_store import embedding_key
+from backend.hashed_embeddings import LOCAL_EMBEDDING_MODEL, get_local_embedder, get_local_embeddings
 from backend.llm import call_gemini_simple
+from backend.vector_index import VectorIndex, top_k_indices
+from backend.ann_index import IVFIndex
+from backend.record_store import as_store
+from backend.config import (
+    ANN_INDEX_PATH, ANN_NPROBE, DEEP_SEARCH_WORKERS, DEEP_SEARCH_SHORTLIST,
+    DEEP_SEARCH_FULL_SCAN_FALLBACK, SEARCH_CACHE_SIZE, SEMANTIC_BACKEND, GEMINI_API_KEY,
+    EMBEDDING_MODEL, HYBRID_CANDIDATES, HYBRID_RRF_K
+)
 
-# try:
-#     from sklearn.metrics.pairwise import cosine_similarity
-#     SKLEARN_AVAILABLE = True
-# except ImportError:
-#     SKLEARN_AVAILABLE = False
-def cosine_similarity(a, b):
-    a = np.array(a)
-    b = np.array(b)
-    return np.dot(a, b.T) / (np.linalg.norm(a, axis=1)[:, np.newaxis] * np.linalg.norm(b, axis=1))
-
-def basic_search(records: list, query: str) -> list:
-    if not records or len(records) < 2:
-        return []
+# Process-wide semantic indexes shared by all sessions, one per (backend, mode),
+# keyed by recordId. _indexed_keys remembers which record text each vector was
+# computed from. Only the Gemini approximate index is saved to disk: local
+# vectors are cheaper to recompute than to load.
+SEMANTIC_MODES = ('exact', 'ann')
+SEMANTIC_BACKENDS = ('gemini', 'local')
+_semantic_indexes = {}
+_indexed_keys = {}
+_ann_recall = {}
+_semantic_lock = threading.Lock()
+
+# Process-wide LRU of search results. Keys include the store version, so an
+# edit or sync never serves stale results; old versions just age out.
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+def _index_id(record_id: str, row_number: int, seen: set) -> str:
+    record_id = record_id or f"row:{row_number}"
+    if record_id in seen:
+        # Duplicate recordIds in the ledger must not overwrite each other
+        record_id = f"{record_id}#{row_number}"
+    seen.add(record_id)
+    return record_id
+
+def _cached_search(key: tuple, search, may_fail: bool = False) -> list:
+    """
+    Results of search() for key, computed once while key stays in the cache
+    may_fail=True: search() returns (results, complete), where complete is
+    False if part of it failed (e.g. an embedding or LLM call); such results
+    are returned but not cached, so the next call runs the search again
+    """
+    if SEARCH_CACHE_SIZE <= 0:
+        return search()[0] if may_fail else search()
     
-    query_lower = query.lower().strip()
-    results = []
+    with _result_cache_lock:
+        results = _result_cache.get(key)
+        if results is not None:
+            _result_cache.move_to_end(key)
+            return list(results)
     
-    headers = records[0]
-    for i, row in enumerate(records[1:], start=2):
-        if len(row) < len(headers):
-            row.extend([''] * (len(headers) - len(row)))
-        
-        record_dict = dict(zip(headers, row))
-        record_dict['row_number'] = i
+    results, complete = search() if may_fail else (search(), True)
+    if complete:
+        with _result_cache_lock:
+            _result_cache[key] = tuple(results)
+            _result_cache.move_to_end(key)
+            while len(_result_cache) > SEARCH_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+    return results
+
+def clear_search_cache():
+    """Drop all cached search results"""
+    with _result_cache_lock:
+        _result_cache.clear()
+
+def resolve_semantic_backend(backend: str = None) -> str:
+    """
+    Backend Smart Search will use: the one asked for (default SEMANTIC_BACKEND),
+    except that without a Gemini API key it always runs locally
+    """
+    backend = (backend or SEMANTIC_BACKEND).lower()
+    if backend not in SEMANTIC_BACKENDS:
+        raise ValueError(f"Unknown semantic search backend: {backend}")
+    return 'local' if backend == 'gemini' and not GEMINI_API_KEY else backend
+
+def _get_semantic_index(backend: str, mode: str):
+    key = (backend, mode)
+    if key not in _semantic_indexes:
+        index, tags = (VectorIndex() if mode == 'exact' else IVFIndex(nprobe=ANN_NPROBE)), {}
+        if mode == 'ann' and backend == 'gemini' and os.path.exists(ANN_INDEX_PATH):
+            try:
+                index, tags = IVFIndex.load(ANN_INDEX_PATH)
+            except Exception as e:
+                st.warning(f"Could not load approximate index, rebuilding: {e}")
+        _semantic_indexes[key] = index
+        _indexed_keys[key] = tags
+    return _semantic_indexes[key]
+
+def _embedding_keys(record_texts: list, backend: str) -> list:
+    model = LOCAL_EMBEDDING_MODEL if backend == 'local' else EMBEDDING_MODEL
+    return [embedding_key(text, model) for text in record_texts]
+
+def _prefetch_embeddings(indexed_keys: dict, index_ids: list, record_texts: list) -> dict:
+    """
+    Gemini vectors of the records the index lacks, by embedding key
+    Runs without _semantic_lock, so the network calls of a cold start do not
+    block other sessions; indexed_keys is only read.
+    """
+    keys = _embedding_keys(record_texts, 'gemini')
+    stale = {keys[i]: record_texts[i] for i, index_id in enumerate(index_ids) if indexed_keys.get(index_id) != keys[i]}
+    return dict(zip(stale, get_record_embeddings(list(stale.values())))) if stale else {}
+
+def _sync_semantic_index(index, indexed_keys: dict, index_ids: list, record_texts: list, backend: str = 'gemini',
+                         prefetched: dict = None):
+    """
+    Add new, re-embed edited and drop closed/removed records
+    prefetched: vectors by embedding key computed beforehand (see _prefetch_embeddings)
+    """
+    embed = get_local_embeddings if backend == 'local' else get_record_embeddings
+    prefetched = prefetched or {}
+    keys = _embedding_keys(record_texts, backend)
+    
+    stale = [i for i, index_id in enumerate(index_ids) if indexed_keys.get(index_id) != keys[i]]
+    if stale:
+        # Only records that changed since the prefetch are embedded here
+        missing = [i for i in stale if keys[i] not in prefetched]
+        computed = dict(zip((keys[i] for i in missing), embed([record_texts[i] for i in missing]))) if missing else {}
+        vectors = [prefetched[keys[i]] if keys[i] in prefetched else computed[keys[i]] for i in stale]
         
-        loan_status = record_dict.get('loanStatus', 'Active')
-        if loan_status == 'Closed':
-            continue
+        add_ids, add_vectors = [], []
+        for i, vector in zip(stale, vectors):
+            index_id = index_ids[i]
+            if vector is None:
+                index.delete(index_id)
+                indexed_keys.pop(index_id, None)
+                continue
+            add_ids.append(index_id)
+            add_vectors.append(vector)
+            indexed_keys[index_id] = keys[i]
         
-        searchable_text = " ".join([
-            record_dict.get('recordId', ''),
-            record_dict.get('nameHindi', ''),
-            record_dict.get('nameEnglish', ''),
-            record_dict.get('addressHindi', ''),
-            record_dict.get('addressEnglish', ''),
-            record_dict.get('wardArea', ''),
-            record_dict.get('mobile', ''),
-            record_dict.get('relationship', '')
-        ]).lower()
+        if add_ids:
+            index.add(add_ids, add_vectors)
+    
+    live = set(index_ids)
+    for index_id in [index_id for index_id in indexed_keys if index_id not in live]:
+        index.delete(index_id)
+        del indexed_keys[index_id]
+
+def _maintain_ann_index(backend: str, index):
+    if index.needs_rebuild():
+        index.rebuild()
+        if backend == 'gemini':
+            index.save(ANN_INDEX_PATH, tags=_indexed_keys[(backend, 'ann')])
+        _ann_recall.pop(backend, None)
+
+def get_ann_recall(nprobe: int = None, top_k: int = 10, backend: str = None) -> float:
+    """
+    Recall@k of the approximate index against exact search on the same vectors
+    Returns: float in [0, 1], or None if the approximate index was never used
+    """
+    backend = resolve_semantic_backend(backend)
+    with _semantic_lock:
+        index = _semantic_indexes.get((backend, 'ann'))
+        if index is None:
+            return None
         
-        if query_lower in searchable_text:
-            results.append(record_dict)
+        nprobe = nprobe or index.nprobe
+        recall = _ann_recall.setdefault(backend, {})
+        if nprobe not in recall:
+            recall[nprobe] = index.evaluate_recall(n_queries=50, top_k=top_k, nprobe=nprobe)
+        return recall[nprobe]
+
+def basic_search(records, query: str) -> list:
+    """
+    Substring search over active records (cached per query and data version)
+    records: rows including header, or a RecordStore
+    Returns: list of LoanRecord
+    """
+    store = as_store(records)
+    if not store.size:
+        return []
+    
+    query_lower = query.lower().strip()
+    return _cached_search(('quick', query_lower, store.version), lambda: _basic_search(store, query_lower))
+
+def _basic_search(store, query_lower: str) -> list:
+    # A pasted recordId or full mobile number is answered from the key indexes
+    positions = store.key_positions(query_lower, prefix=False)
+    if positions is not None:
+        positions = np.intersect1d(positions, store.open_positions, assume_unique=True)
+        if len(positions):
+            return store.records(positions)
+    
+    searchable_text = store.search_text('quick')
+    
+    # The trigram index narrows the scan to records containing every trigram of the query
+    positions = store.open_positions
+    candidates = store.text_candidates('quick', query_lower)
+    if candidates is not None:
+        positions = np.intersect1d(candidates, positions, assume_unique=True)
+    
+    # Leading digits of a mobile number also match numbers formatted with spaces or +91
+    key_hits = store.key_positions(query_lower)
+    if key_hits is not None:
+        key_hits = np.intersect1d(key_hits, store.open_positions, assume_unique=True)
+        positions = np.union1d(positions, key_hits)
+    key_hits = set() if key_hits is None else set(key_hits.tolist())
+    
+    results = [store.record(i) for i in positions.tolist() if query_lower in searchable_text[i] or i in key_hits]
+    
+    # Nothing contains the text: fall back to names that sound alike ("Ramlal" -> राम लाल)
+    if not results:
+        results = _phonetic_search(store, query_lower)
     
     return results
 
-def semantic_search(records: list, query: str, top_k: int = 5) -> list:
-    if not records or len(records) < 2:
+def phonetic_search(records, query: str) -> list:
+    """
+    Active records whose Hindi or English name sounds like the query
+    Matches across scripts and spellings ("Ramlal", "Raam Laal", "राम लाल")
+    using the precomputed phonetic index, without any external model.
+    records: rows including header, or a RecordStore
+    Returns: list of LoanRecord
+    """
+    store = as_store(records)
+    if not store.size:
+        return []
+    
+    query = query.strip()
+    return _cached_search(('phonetic', query, store.version), lambda: _phonetic_search(store, query))
+
+def _phonetic_search(store, query: str) -> list:
+    positions = np.intersect1d(store.phonetic_positions(query), store.open_positions, assume_unique=True)
+    return store.records(positions)
+
+def semantic_search(records, query: str, top_k: int = 5, mode: str = 'exact', nprobe: int = None,
+                    backend: str = None) -> list:
+    """
+    Embedding similarity search over active records
+    records: rows including header, or a RecordStore
+    mode: 'exact' (brute-force matrix scan) or 'ann' (IVF index; nprobe tunes recall vs latency)
+    backend: 'gemini' (embedding API) or 'local' (offline hashed character n-grams);
+        default SEMANTIC_BACKEND, see resolve_semantic_backend()
+    Returns: list of LoanRecord, best match first
+    """
+    store = as_store(records)
+    if not store.size:
         return []
     
+    if mode not in SEMANTIC_MODES:
+        raise ValueError(f"Unknown semantic search mode: {mode}")
+    backend = resolve_semantic_backend(backend)
+    
+    key = ('smart', query, store.version, top_k, mode, nprobe if mode == 'ann' else None, backend)
+    return _cached_search(key, lambda: _semantic_search(store, query, top_k, mode, nprobe, backend), may_fail=True)
+
+def _semantic_search(store, query: str, top_k: int, mode: str, nprobe: int, backend: str) -> tuple:
     with st.spinner("Processing..."):
+        positions = _semantic_positions(store, query, top_k, mode, nprobe, backend)
+        if positions is None:
+            return [], False
+        return store.records(positions), True
+
+def _semantic_positions(store, query: str, top_k: int, mode: str, nprobe: int, backend: str) -> list:
+    """Store positions of the top_k most similar active records, best first (None if the query cannot be embedded)"""
+    if backend == 'gemini':
         query_embedding = get_embedding(query)
         
         if not query_embedding:
             st.warning("Could not compute query embedding")
-            return []
-        
-        headers = records[0]
-        similarities = []
-        
-        for i, row in enumerate(records[1:], start=2):
-            if len(row) < len(headers):
-                row.extend([''] * (len(headers) - len(row)))
-            
-            record_dict = dict(zip(headers, row))
-            record_dict['row_number'] = i
-            
-            loan_status = record_dict.get('loanStatus', 'Active')
-            if loan_status == 'Closed':
-                continue
-            
-            record_text = " ".join([
-                record_dict.get('recordId', ''),
-                record_dict.get('nameHindi', ''),
-                record_dict.get('nameEnglish', ''),
-                record_dict.get('addressHindi', ''),
-                record_dict.get('addressEnglish', ''),
-                record_dict.get('wardArea', ''),
-                record_dict.get('mobile', ''),
-                record_dict.get('date', ''),
-                record_dict.get('amount', ''),
-                record_dict.get('relationship', '')
-            ])
-            
-            record_embedding = get_embedding(record_text)
-            
-            if record_embedding:
-                similarity = cosine_similarity(
-                    [query_embedding],
-                    [record_embedding]
-                )[0][0]
-                
-                similarities.append({
-                    'record': record_dict,
-                    'similarity': similarity
-                })
+            return None
         
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
-        results = [item['record'] for item in similarities[:top_k]]
+    positions_by_id = {}
+    index_ids = []
+    record_texts = []
+    seen = set()
+    
+    texts = store.search_text('semantic')
+    record_ids = store.column('recordId')
+    
+    for i in store.open_positions.tolist():
+        record_text = texts[i]
         
-        return results
-
-def ai_deep_search(records: list, query: str, batch_size: int = 20) -> list:
-    if not records or len(records) < 2:
-        return []
+        index_id = _index_id(record_ids[i], int(store.row_numbers[i]), seen)
+        positions_by_id[index_id] = i
+        index_ids.append(index_id)
+        record_texts.append(record_text)
     
-    headers = records[0]
-    all_records = []
+    prefetched = None
+    if backend == 'gemini':
+        with _semantic_lock:
+            _get_semantic_index(backend, mode)
+            indexed_keys = dict(_indexed_keys[(backend, mode)])
+        prefetched = _prefetch_embeddings(indexed_keys, index_ids, record_texts)
     
-    for i, row in enumerate(records[1:], start=2):
-        if len(row) < len(headers):
-            row.extend([''] * (len(headers) - len(row)))
-        record_dict = dict(zip(headers, row))
-        record_dict['row_number'] = i
+    with _semantic_lock:
+        index = _get_semantic_index(backend, mode)
+        _sync_semantic_index(index, _indexed_keys[(backend, mode)], index_ids, record_texts, backend, prefetched)
         
-        loan_status = record_dict.get('loanStatus', 'Active')
-        if loan_status == 'Closed':
-            continue
+        if backend == 'local':
+            # Embedded after the records: the first sync fits the IDF weights
+            query_embedding = get_local_embedder().embed(query)
+            if query_embedding is None:
+                st.warning("Could not compute query embedding")
+                return None
         
-        all_records.append(record_dict)
+        if mode == 'ann':
+            _maintain_ann_index(backend, index)
+            matches = index.search(query_embedding, top_k, nprobe=nprobe)
+        else:
+            matches = index.search(query_embedding, top_k)
     
-    if not all_records:
+    return [positions_by_id[index_id] for index_id, _ in matches]
+
+def reciprocal_rank_fusion(rankings: list, k: int = HYBRID_RRF_K) -> list:
+    """
+    Merge several rankings (lists of ids, best first) into one
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in (rank
+    starting at 1), so ids ranked well by several retrievers come first.
+    Ties keep the order in which ids were first seen.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def _bm25_positions(store, query_lower: str, top_k: int) -> list:
+    """Store positions of the top_k active records by BM25 score, best first"""
+    scores = store.bm25_index('quick').scores(query_lower)
+    if scores is None:
         return []
     
-    best_matches = []
-    total_batches = (len(all_records) + batch_size - 1) // batch_size
+    positions = store.open_positions
+    scores = scores[positions]
+    matched = np.flatnonzero(scores > 0)
+    best = top_k_indices(scores[matched], top_k)
+    return positions[matched[best]].tolist()
+
+def hybrid_search(records, query: str, top_k: int = 10, mode: str = 'exact', nprobe: int = None,
+                  backend: str = None) -> list:
+    """
+    Lexical and semantic search over active records in one ranked list
+    BM25 over the Quick Search fields and embedding similarity (as in
+    semantic_search) each rank HYBRID_CANDIDATES records; the two rankings are
+    merged with reciprocal rank fusion. Exact words and numbers weigh in through
+    BM25, spelling variants and related wording through the vectors.
+    records: rows including header, or a RecordStore
+    mode, nprobe, backend: as for semantic_search
+    Returns: list of LoanRecord, best match first
+    """
+    store = as_store(records)
+    if not store.size:
+        return []
     
-    progress_bar = st.progress(0)
+    if mode not in SEMANTIC_MODES:
+        raise ValueError(f"Unknown semantic search mode: {mode}")
+    backend = resolve_semantic_backend(backend)
     
-    for batch_idx in range(0, len(all_records), batch_size):
-        batch = all_records[batch_idx:batch_idx + batch_size]
+    key = ('hybrid', query, store.version, top_k, mode, nprobe if mode == 'ann' else None, backend)
+    return _cached_search(key, lambda: _hybrid_search(store, query, top_k, mode, nprobe, backend), may_fail=True)
+
+def _hybrid_search(store, query: str, top_k: int, mode: str, nprobe: int, backend: str) -> tuple:
+    with st.spinner("Processing..."):
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        lexical = _bm25_positions(store, query.lower().strip(), candidates)
+        semantic = _semantic_positions(store, query, candidates, mode, nprobe, backend)
         
-        batch_text = "\n\n".join([
-            f"Record {r['row_number']}: ID: {r.get('recordId', '')}, Name: {r.get('nameHindi', '')} / {r.get('nameEnglish', '')}, Address: {r.get('addressHindi', '')} / {r.get('addressEnglish', '')}, Ward: {r.get('wardArea', '')}, Mobile: {r.get('mobile', '')}, Amount: {r.get('amount', '')}, Relationship: {r.get('relationship', '')}"
-            for r in batch
-        ])
+        # Without a query embedding the BM25 ranking is still shown, but not cached
+        fused = reciprocal_rank_fusion([lexical, semantic or []])[:top_k]
+        return store.records(fused), semantic is not None
+
+def _trigrams(text: str) -> set:
+    text = f" {' '.join(text.lower().split())} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def lexical_score(query: str, record_text: str) -> float:
+    """
+    Cheap local relevance score used to shortlist records for the LLM:
+    character-trigram overlap with the query (fuzzy, works for Hindi and English),
+    plus a bonus for every query word found verbatim.
+    record_text: the record's lowercased 'deep' search text (see RecordStore.search_text)
+    """
+    return lexical_scores(query, [record_text])[0]
+
+def lexical_scores(query: str, record_texts: list) -> list:
+    """lexical_score of every text, with the query's trigrams and words computed once"""
+    query_grams = _trigrams(query)
+    if not query_grams:
+        return [0.0] * len(record_texts)
+    
+    words = query.lower().split()
+    return [
+        len(query_grams & _trigrams(text)) / len(query_grams) + sum(1 for word in words if word in text) / len(words)
+        for text in record_texts
+    ]
+
+def _deep_search_batches(batches: list, query: str, progress_bar, progress_start: float, progress_span: float) -> tuple:
+    """Returns: (matching records, whether every batch got an answer from the LLM)"""
+    batch_matches = [[] for _ in batches]
+    
+    # Batches run concurrently; the LLM token buckets keep us within quota.
+    # Progress is updated from this (the script) thread as batches finish.
+    with ThreadPoolExecutor(max_workers=max(1, DEEP_SEARCH_WORKERS)) as executor:
+        futures = {
+            executor.submit(_deep_search_batch, batch, query): batch_no
+            for batch_no, batch in enumerate(batches)
+        }
         
-        prompt = f"""You are a search expert. Find the most relevant records that match this query: "{query}"
+        for done, future in enumerate(as_completed(futures), start=1):
+            batch_matches[futures[future]] = future.result()
+            progress_bar.progress(min(1.0, progress_start + progress_span * done / len(batches)))
+    
+    complete = all(matches is not None for matches in batch_matches)
+    return [record for matches in batch_matches for record in matches or []], complete
+
+def _deep_search_batch(batch: list, query: str) -> list:
+    """Records of the batch the LLM picked, or None if it gave no usable answer"""
+    batch_text = "\n\n".join([
+        f"Record {r['row_number']}: ID: {r.get('recordId', '')}, Name: {r.get('nameHindi', '')} / {r.get('nameEnglish', '')}, Address: {r.get('addressHindi', '')} / {r.get('addressEnglish', '')}, Ward: {r.get('wardArea', '')}, Mobile: {r.get('mobile', '')}, Amount: {r.get('amount', '')}, Relationship: {r.get('relationship', '')}"
+        for r in batch
+    ])
+    
+    prompt = f"""You are a search expert. Find the most relevant records that match this query: "{query}"
 
 Records to search:
 {batch_text}
@@ -150,20 +430,76 @@ Format: {{"matches": [row_number1, row_number2, ...]}}
 
 If no good matches, return: {{"matches": []}}"""
 
-        result = call_gemini_simple(prompt)
-        
-        if result:
-            try:
-                matches = json.loads(result).get('matches', [])
-                for row_num in matches:
-                    matching_record = next((r for r in batch if r['row_number'] == row_num), None)
-                    if matching_record:
-                        best_matches.append(matching_record)
-            except:
-                pass
-        
-        progress_bar.progress(min(1.0, (batch_idx + batch_size) / len(all_records)))
+    result = call_gemini_simple(prompt)
+    if not result:
+        return None
+    
+    matches = []
+    try:
+        for row_num in json.loads(result).get('matches', []):
+            matching_record = next((r for r in batch if r['row_number'] == row_num), None)
+            if matching_record:
+                matches.append(matching_record)
+    except:
+        return None
+    
+    return matches
+
+def ai_deep_search(records, query: str, batch_size: int = 20,
+                   shortlist_size: int = None, full_scan_fallback: bool = None) -> list:
+    """
+    LLM search over active records, as a cascade:
+    a local lexical scorer shortlists the top `shortlist_size` records (0 = no shortlist)
+    and only those are sent to the LLM. With `full_scan_fallback`, the remaining
+    records are sent too when the shortlist produced no match.
+    Both default to DEEP_SEARCH_SHORTLIST / DEEP_SEARCH_FULL_SCAN_FALLBACK.
+    records: rows including header, or a RecordStore
+    """
+    store = as_store(records)
+    if not store.size:
+        return []
+    
+    shortlist_size = DEEP_SEARCH_SHORTLIST if shortlist_size is None else shortlist_size
+    full_scan_fallback = DEEP_SEARCH_FULL_SCAN_FALLBACK if full_scan_fallback is None else full_scan_fallback
+    
+    key = ('deep', query, store.version, batch_size, shortlist_size, full_scan_fallback)
+    return _cached_search(
+        key, lambda: _ai_deep_search(store, query, batch_size, shortlist_size, full_scan_fallback),
+        may_fail=True
+    )
+
+def _ai_deep_search(store, query: str, batch_size: int, shortlist_size: int, full_scan_fallback: bool) -> tuple:
+    positions = store.open_positions.tolist()
+    all_records = store.records(positions)
+    
+    if not all_records:
+        return [], True
+    
+    # Stage 1: rank everything locally, only the shortlist goes to the LLM
+    if shortlist_size and len(all_records) > shortlist_size:
+        texts = store.search_text('deep')
+        scores = lexical_scores(query, [texts[i] for i in positions])
+        order = sorted(range(len(all_records)), key=scores.__getitem__, reverse=True)
+        ranked = [all_records[j] for j in order]
+        shortlist, remainder = ranked[:shortlist_size], ranked[shortlist_size:]
+    else:
+        shortlist, remainder = all_records, []
+    
+    def to_batches(items):
+        return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    
+    progress_bar = st.progress(0)
+    
+    # Stage 2: LLM reranking of the shortlist
+    shortlist_span = len(shortlist) / len(all_records) if full_scan_fallback else 1.0
+    best_matches, complete = _deep_search_batches(to_batches(shortlist), query, progress_bar, 0.0, shortlist_span)
+    
+    if not best_matches and remainder and full_scan_fallback:
+        best_matches, remainder_complete = _deep_search_batches(
+            to_batches(remainder), query, progress_bar, shortlist_span, 1.0 - shortlist_span
+        )
+        complete = complete and remainder_complete
     
     progress_bar.empty()
     
-    return best_matches[:10]
\ No newline at end of file
+    return best_matches[:10], complete
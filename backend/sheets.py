@@ -1,116 +1,351 @@
 import os
+import threading
+import google_auth_httplib2
 import streamlit as st
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from backend.config import SCOPES, SPREADSHEET_ID
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
+from backend import sheets_scheduler
+from backend.config import (
+    SCOPES, SPREADSHEET_ID, SHEETS_BACKEND, STATUS_UPDATE_CHUNK_SIZE, READ_CHUNK_ROWS
+)
+
+HEADERS = [
+    'recordId',
+    'date', 
+    'nameHindi', 'nameEnglish',
+    'addressHindi', 'addressEnglish',
+    'wardArea',
+    'mobile', 
+    'dairyNumber',
+    'pageNumber', 
+    'amount',
+    'interest',
+    'guarantee',
+    'relationship',
+    'loanStatus'
+]
+
+# One Sheets client per process, shared by every Streamlit session
+_service_lock = threading.Lock()
+_credentials_lock = threading.Lock()
+_spreadsheets = None
+_thread_local = threading.local()
+
+def _load_credentials():
+    if "gcp_service_account" in st.secrets:
+        return service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"],
+            scopes=SCOPES
+        )
+    
+    if os.path.exists("service-account.json"):
+        return service_account.Credentials.from_service_account_file(
+            "service-account.json",
+            scopes=SCOPES
+        )
+    
+    return None
+
+def _fresh_credentials(credentials):
+    # Only one thread refreshes an expired token; the others wait and reuse it
+    with _credentials_lock:
+        if not credentials.valid:
+            credentials.refresh(Request())
+        return credentials
+
+def _thread_http():
+    # httplib2.Http is not thread-safe: each thread keeps its own (with the
+    # client library's default timeout) and reuses its connections
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = build_http()
+    return http
+
+def _request_builder(credentials):
+    """
+    requestBuilder for a service built with these credentials
+    The discovery document and credentials stay shared, the transport is per
+    thread. Requests still in flight after reset_sheets_service() keep the
+    credentials of the service that issued them.
+    """
+    def build_request(http, *args, **kwargs):
+        authed_http = google_auth_httplib2.AuthorizedHttp(_fresh_credentials(credentials), http=_thread_http())
+        return HttpRequest(authed_http, *args, **kwargs)
+    return build_request
 
 def get_sheets_service():
-    try:
-        if "gcp_service_account" in st.secrets:
-            creds = service_account.Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"],
-                scopes=SCOPES
-            )
-            service = build('sheets', 'v4', credentials=creds)
-            return service.spreadsheets()
+    global _spreadsheets
+    
+    if _spreadsheets is not None:
+        return _spreadsheets
+    
+    with _service_lock:
+        if _spreadsheets is not None:
+            return _spreadsheets
         
-        elif os.path.exists("service-account.json"):
-            creds = service_account.Credentials.from_service_account_file(
-                "service-account.json",
-                scopes=SCOPES
+        try:
+            if SHEETS_BACKEND == "fake":
+                from backend.fake_sheets import create_from_config
+                _spreadsheets = create_from_config()
+                return _spreadsheets
+            
+            creds = _load_credentials()
+            if creds is None:
+                st.error("⚠️ No Google Sheets credentials found!")
+                return None
+            
+            service = build(
+                'sheets', 'v4',
+                credentials=creds,
+                requestBuilder=_request_builder(creds),
+                cache_discovery=False
             )
-            service = build('sheets', 'v4', credentials=creds)
-            return service.spreadsheets()
+            _spreadsheets = service.spreadsheets()
+            return _spreadsheets
         
-        else:
-            st.error("⚠️ No Google Sheets credentials found!")
+        except Exception as e:
+            st.error(f"❌ Error connecting to Google Sheets: {e}")
             return None
-        
-    except Exception as e:
-        st.error(f"❌ Error connecting to Google Sheets: {e}")
-        return None
 
-def read_all_records():
+def reset_sheets_service():
+    """Drop the shared client so the next call rebuilds it with fresh credentials"""
+    global _spreadsheets, _header_present
+    with _service_lock:
+        _spreadsheets = None
+        _header_present = False
+
+def _is_auth_error(error: Exception) -> bool:
+    if isinstance(error, RefreshError):
+        return True
+    return isinstance(error, HttpError) and error.resp.status in (401, 403)
+
+def _on_sheets_error(error: Exception):
+    if _is_auth_error(error):
+        reset_sheets_service()
+
+def fetch_all_rows() -> list:
+    """
+    Download Sheet1!A:O
+    Returns: list of rows including header
+    Raises: on missing configuration or API errors
+    """
     sheet = get_sheets_service()
     if not sheet or not SPREADSHEET_ID:
-        return []
+        raise RuntimeError("Google Sheets not configured properly.")
     
     try:
-        result = sheet.values().get(
+        result = sheets_scheduler.execute(lambda: sheet.values().get(
             spreadsheetId=SPREADSHEET_ID,
             range='Sheet1!A:O'
-        ).execute()
-        rows = result.get('values', [])
-        return rows
+        ), 'read', coalesce_key=('get', 'Sheet1!A:O'))
     except Exception as e:
-        st.error(f"❌ Error reading from Google Sheets: {e}")
-        return []
+        _on_sheets_error(e)
+        raise
+    
+    return result.get('values', [])
 
-def append_record_to_sheet(record_data: dict):
+def fetch_rows_since(row_count: int) -> dict:
+    """
+    Incremental read for a replica that already holds rows 1..row_count
+    (rows are only ever appended and loanStatus is the only column edited in place).
+    One batchGet returns:
+        'tail': rows after row_count (list of rows)
+        'statuses': loanStatus cells of rows 2..row_count (list, '' for blank)
+        'last_record_id': recordId now in row row_count, to detect deletions/reordering
+    Raises: on missing configuration or API errors
+    """
     sheet = get_sheets_service()
     if not sheet or not SPREADSHEET_ID:
-        st.error("⚠️ Google Sheets not configured properly.")
-        return False
+        raise RuntimeError("Google Sheets not configured properly.")
+    
+    ranges = [
+        f'Sheet1!A{row_count + 1}:O',
+        f'Sheet1!A{row_count}',
+        f'Sheet1!O2:O{max(row_count, 2)}',
+    ]
     
     try:
-        from backend.utils import generate_record_id
+        result = sheets_scheduler.execute(lambda: sheet.values().batchGet(
+            spreadsheetId=SPREADSHEET_ID,
+            ranges=ranges
+        ), 'read', coalesce_key=('batchGet', tuple(ranges)))
+    except Exception as e:
+        _on_sheets_error(e)
+        raise
+    
+    tail, last_id, status_cells = [vr.get('values', []) for vr in result.get('valueRanges', [])]
+    statuses = [cells[0] if cells else '' for cells in status_cells]
+    statuses += [''] * (row_count - 1 - len(statuses))
+    
+    return {
+        'tail': tail,
+        'statuses': statuses[:max(row_count - 1, 0)],
+        'last_record_id': last_id[0][0] if last_id and last_id[0] else '',
+    }
+
+def _column_runs(indexes: list) -> list:
+    """Group column indexes into contiguous [first, last] runs, one A1 range each"""
+    runs = []
+    for index in sorted(set(indexes)):
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+def _column_letter(index: int) -> str:
+    return chr(ord('A') + index)
+
+def iter_records(columns: list = None, chunk_size: int = READ_CHUNK_ROWS, start_row: int = 2, end_row: int = None):
+    """
+    Stream Sheet1 in fixed-size row windows, fetching only the requested columns
+    Args:
+        columns: header names to fetch, e.g. ['loanStatus'] (default: all of A:O)
+        chunk_size: rows per request
+        start_row: first sheet row to read (2 skips the header)
+        end_row: last sheet row to read (default: until the data ends)
+    Yields: one list per sheet row with the values of `columns`, in that order ('' for blanks)
+    Raises: on missing configuration or API errors
+    """
+    sheet = get_sheets_service()
+    if not sheet or not SPREADSHEET_ID:
+        raise RuntimeError("Google Sheets not configured properly.")
+    
+    indexes = [HEADERS.index(column) for column in columns] if columns else list(range(len(HEADERS)))
+    runs = _column_runs(indexes)
+    
+    # Rows that are blank in every requested column are only emitted once
+    # later data shows they are not the end of the sheet
+    held_blank_rows = 0
+    row = start_row
+    
+    while end_row is None or row <= end_row:
+        last = row + chunk_size - 1 if end_row is None else min(row + chunk_size - 1, end_row)
+        
+        ranges = [f"Sheet1!{_column_letter(a)}{row}:{_column_letter(b)}{last}" for a, b in runs]
+        try:
+            result = sheets_scheduler.execute(lambda: sheet.values().batchGet(
+                spreadsheetId=SPREADSHEET_ID,
+                ranges=ranges
+            ), 'read', coalesce_key=('batchGet', tuple(ranges)))
+        except Exception as e:
+            _on_sheets_error(e)
+            raise
         
-        existing = read_all_records()
+        value_ranges = [vr.get('values', []) for vr in result.get('valueRanges', [])]
+        filled = max((len(values) for values in value_ranges), default=0)
+        if end_row is None and filled == 0:
+            break
         
-        record_id = generate_record_id(
-            record_data.get('nameEnglish', record_data.get('nameHindi', 'Unknown')),
-            record_data.get('date', '')
-        )
+        for _ in range(held_blank_rows):
+            yield [''] * len(indexes)
         
-        if not existing:
-            headers = [[
-                'recordId',
-                'date', 
-                'nameHindi', 'nameEnglish',
-                'addressHindi', 'addressEnglish',
-                'wardArea',
-                'mobile', 
-                'dairyNumber',
-                'pageNumber', 
-                'amount',
-                'interest',
-                'guarantee',
-                'relationship',
-                'loanStatus'
-            ]]
-            sheet.values().update(
-                spreadsheetId=SPREADSHEET_ID,
-                range='Sheet1!A1',
-                valueInputOption='RAW',
-                body={'values': headers}
-            ).execute()
+        window_rows = filled if end_row is None else last - row + 1
+        for i in range(window_rows):
+            cells = {}
+            for (first, last_column), values in zip(runs, value_ranges):
+                row_values = values[i] if i < len(values) else []
+                for index in range(first, last_column + 1):
+                    offset = index - first
+                    cells[index] = row_values[offset] if offset < len(row_values) else ''
+            yield [cells[index] for index in indexes]
         
-        row = [[
-            record_id,
-            record_data.get('date', ''),
-            record_data.get('nameHindi', ''),
-            record_data.get('nameEnglish', ''),
-            record_data.get('addressHindi', ''),
-            record_data.get('addressEnglish', ''),
-            record_data.get('wardArea', ''),
-            record_data.get('mobile', ''),
-            record_data.get('dairyNumber','d2'),
-            record_data.get('pageNumber', ''),
-            record_data.get('amount', ''),
-            record_data.get('interest', ''),
-            record_data.get('guarantee', ''),
-            record_data.get('relationship', ''),
-            'Active'
-        ]]
+        held_blank_rows = (last - row + 1) - window_rows
+        row = last + 1
+
+def read_all_records():
+    try:
+        return fetch_all_rows()
+    except Exception as e:
+        st.error(f"❌ Error reading from Google Sheets: {e}")
+        return []
+
+_header_present = False
+
+def _ensure_header(sheet):
+    """Write the header row if row 1 is empty (a bounded A1:O1 read, once per process)"""
+    global _header_present
+    if _header_present:
+        return
+    
+    result = sheets_scheduler.execute(lambda: sheet.values().get(
+        spreadsheetId=SPREADSHEET_ID,
+        range='Sheet1!A1:O1'
+    ), 'read', coalesce_key=('get', 'Sheet1!A1:O1'))
+    
+    if not result.get('values'):
+        sheets_scheduler.execute(lambda: sheet.values().update(
+            spreadsheetId=SPREADSHEET_ID,
+            range='Sheet1!A1',
+            valueInputOption='RAW',
+            body={'values': [HEADERS]}
+        ), 'write')
+    
+    _header_present = True
+
+def build_record_row(record_data: dict) -> list:
+    """
+    Sheet row for a new record, with a freshly generated recordId
+    Returns: list of 15 cell values (recordId first, loanStatus 'Active')
+    """
+    from backend.utils import generate_record_id
+    
+    record_id = generate_record_id(
+        record_data.get('nameEnglish', record_data.get('nameHindi', 'Unknown')),
+        record_data.get('date', '')
+    )
+    
+    return [
+        record_id,
+        record_data.get('date', ''),
+        record_data.get('nameHindi', ''),
+        record_data.get('nameEnglish', ''),
+        record_data.get('addressHindi', ''),
+        record_data.get('addressEnglish', ''),
+        record_data.get('wardArea', ''),
+        record_data.get('mobile', ''),
+        record_data.get('dairyNumber','d2'),
+        record_data.get('pageNumber', ''),
+        record_data.get('amount', ''),
+        record_data.get('interest', ''),
+        record_data.get('guarantee', ''),
+        record_data.get('relationship', ''),
+        'Active'
+    ]
+
+def append_rows(rows: list):
+    """
+    Append many rows in one values().append call (writes the header first if missing)
+    Raises: on missing configuration or API errors
+    """
+    sheet = get_sheets_service()
+    if not sheet or not SPREADSHEET_ID:
+        raise RuntimeError("Google Sheets not configured properly.")
+    
+    try:
+        _ensure_header(sheet)
         
-        sheet.values().append(
+        sheets_scheduler.execute(lambda: sheet.values().append(
             spreadsheetId=SPREADSHEET_ID,
             range='Sheet1!A:O',
             valueInputOption='RAW',
             insertDataOption='INSERT_ROWS',
-            body={'values': row}
-        ).execute()
-        
+            body={'values': rows}
+        ), 'write', idempotent=False)
+    except Exception as e:
+        _on_sheets_error(e)
+        raise
+    
+    from backend.replica import invalidate
+    invalidate()
+
+def append_record_to_sheet(record_data: dict):
+    try:
+        append_rows([build_record_row(record_data)])
         return True
     except Exception as e:
         st.error(f"❌ Error writing to Google Sheets: {e}")
@@ -123,18 +358,95 @@ def update_loan_status(row_number: int, new_status: str):
         return False
     
     try:
-        result = sheet.values().update(
+        result = sheets_scheduler.execute(lambda: sheet.values().update(
             spreadsheetId=SPREADSHEET_ID,
             range=f'Sheet1!O{row_number}',
             valueInputOption='RAW',
             body={'values': [[new_status]]}
-        ).execute()
+        ), 'write')
         
         if result.get('updatedCells', 0) > 0:
+            from backend.replica import apply_statuses
+            apply_statuses({row_number: new_status})
             return True
         else:
             return False
         
     except Exception as e:
+        _on_sheets_error(e)
         st.error(f"❌ Error updating Google Sheets: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def update_loan_statuses(updates: list, chunk_size: int = STATUS_UPDATE_CHUNK_SIZE) -> list:
+    """
+    Change many loan statuses with values().batchUpdate
+    Args:
+        updates: list of (row_number or recordId, new_status) pairs
+        chunk_size: cells per batchUpdate call; larger inputs are split automatically
+    Returns: list of dicts aligned with updates:
+        {'key', 'row_number', 'status', 'success', 'error'}
+    """
+    results = [
+        {'key': key, 'row_number': None, 'status': status, 'success': False, 'error': None}
+        for key, status in updates
+    ]
+    
+    # recordIds are resolved to sheet rows through the replica
+    if any(not isinstance(key, int) for key, _ in updates):
+        from backend.replica import get_records
+        row_by_id = {}
+        for row_number, row in enumerate(get_records()[1:], start=2):
+            if row:
+                row_by_id.setdefault(row[0], row_number)
+    
+    for result in results:
+        key = result['key']
+        if isinstance(key, int):
+            result['row_number'] = key if key >= 2 else None
+        else:
+            result['row_number'] = row_by_id.get(key)
+        if result['row_number'] is None:
+            result['error'] = f"Unknown record: {key}"
+    
+    pending = [result for result in results if result['row_number'] is not None]
+    if not pending:
+        return results
+    
+    sheet = get_sheets_service()
+    if not sheet or not SPREADSHEET_ID:
+        for result in pending:
+            result['error'] = "Google Sheets not configured properly."
+        return results
+    
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        
+        try:
+            response = sheets_scheduler.execute(lambda: sheet.values().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID,
+                body={
+                    'valueInputOption': 'RAW',
+                    'data': [
+                        {'range': f"Sheet1!O{result['row_number']}", 'values': [[result['status']]]}
+                        for result in chunk
+                    ]
+                }
+            ), 'write')
+            
+            responses = response.get('responses', [])
+            for i, result in enumerate(chunk):
+                updated = responses[i].get('updatedCells', 0) if i < len(responses) else 0
+                result['success'] = updated > 0
+                if not result['success']:
+                    result['error'] = "No cell updated"
+        except Exception as e:
+            _on_sheets_error(e)
+            for result in chunk:
+                result['error'] = str(e)
+    
+    written = {result['row_number']: result['status'] for result in results if result['success']}
+    if written:
+        from backend.replica import apply_statuses
+        apply_statuses(written)
+    
+    return results
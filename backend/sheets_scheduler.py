@@ -0,0 +1,116 @@
+"""
+Sheets Scheduler - single gateway for all Google Sheets traffic
+Every request waits for a token from its quota class (read/write), is retried
+with exponential backoff and full jitter on 429/5xx and connection errors,
+and identical reads already in flight are shared instead of sent again.
+"""
+
+import time
+import random
+import threading
+from googleapiclient.errors import HttpError
+from backend.config import SHEETS_READ_RPM, SHEETS_WRITE_RPM, SHEETS_MAX_RETRIES
+from backend.rate_limit import TokenBucket
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+
+_buckets = {
+    'read': TokenBucket.per_minute(SHEETS_READ_RPM, burst=max(1.0, SHEETS_READ_RPM / 6)),
+    'write': TokenBucket.per_minute(SHEETS_WRITE_RPM, burst=max(1.0, SHEETS_WRITE_RPM / 6)),
+}
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Bumped whenever a write starts, so a read never joins one that began before the write
+_write_generation = 0
+
+stats = {'requests': 0, 'retries': 0, 'coalesced': 0}
+
+class _InflightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def _is_retryable(error: Exception, idempotent: bool) -> bool:
+    if isinstance(error, HttpError):
+        if not idempotent:
+            # A 5xx may have been applied anyway; only a 429 is a guaranteed rejection
+            return error.resp.status == 429
+        return error.resp.status in RETRY_STATUSES
+    return idempotent and isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    if isinstance(error, HttpError):
+        retry_after = error.resp.get('retry-after')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+def _run(build_request, quota: str, idempotent: bool):
+    attempt = 0
+    while True:
+        _buckets[quota].acquire()
+        stats['requests'] += 1
+        try:
+            return build_request().execute()
+        except Exception as e:
+            if attempt >= SHEETS_MAX_RETRIES or not _is_retryable(e, idempotent):
+                raise
+            stats['retries'] += 1
+            time.sleep(_retry_delay(e, attempt))
+            attempt += 1
+
+def execute(build_request, quota: str = 'read', coalesce_key=None, idempotent: bool = True):
+    """
+    Run one Sheets API request
+    Args:
+        build_request: zero-argument callable returning the request, e.g.
+            lambda: sheet.values().get(spreadsheetId=..., range=...)
+            (rebuilt on every attempt so refreshed credentials are picked up)
+        quota: 'read' or 'write'
+        coalesce_key: hashable identity of a read; concurrent calls with the
+            same key share a single request and its result
+        idempotent: False for requests that must not be repeated after an
+            ambiguous failure (appends); those are only retried on 429
+    Returns: the API response
+    Raises: the last error once retries are exhausted or the error is not retryable
+    """
+    global _write_generation
+
+    if quota == 'write':
+        with _inflight_lock:
+            _write_generation += 1
+
+    if coalesce_key is None:
+        return _run(build_request, quota, idempotent)
+
+    with _inflight_lock:
+        coalesce_key = (coalesce_key, _write_generation)
+        call = _inflight.get(coalesce_key)
+        leader = call is None
+        if leader:
+            call = _InflightCall()
+            _inflight[coalesce_key] = call
+        else:
+            stats['coalesced'] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run(build_request, quota, idempotent)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(coalesce_key, None)
+        call.done.set()
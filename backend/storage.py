@@ -3,16 +3,22 @@ Storage Module - Google Sheets Data Access Layer
 Provides unified interface for loading records from Google Sheets
 """
 
+import numpy as np
 import streamlit as st
-from .sheets import read_all_records
+from .replica import get_records, get_version, invalidate
+from .sheets import iter_records
+from .record_store import as_store, get_store, STATUS_ACTIVE, STATUS_CLOSED, TEXT_INDEX_FIELDS
+
+# search_records fields that can be answered by an identifier lookup
+KEY_SEARCH_FIELDS = {'all': ('mobile', 'recordId'), 'mobile': ('mobile',), 'recordId': ('recordId',)}
 
 def load_records():
     """
-    Load all loan records from Google Sheets
+    Load all loan records (served from the shared replica of Google Sheets)
     Returns: list of rows (list of lists) including header
     """
     try:
-        records = read_all_records()
+        records = get_records()
         
         if not records:
             st.warning("⚠️ No records found in Google Sheets")
@@ -47,17 +53,10 @@ def get_active_records():
     if not records or len(records) <= 1:
         return []
     
-    # Keep header
-    active_records = [records[0]]
+    store = as_store(records)
     
-    # Filter active records
-    for row in records[1:]:
-        if len(row) >= 15:
-            status = row[14] if len(row) > 14 else 'Active'
-            if status == 'Active':
-                active_records.append(row)
-    
-    return active_records
+    # Keep header
+    return [records[0]] + [store.rows[i] for i in store.positions(STATUS_ACTIVE)]
 
 def get_closed_records():
     """
@@ -68,17 +67,10 @@ def get_closed_records():
     if not records or len(records) <= 1:
         return []
     
-    # Keep header
-    closed_records = [records[0]]
-    
-    # Filter closed records
-    for row in records[1:]:
-        if len(row) >= 15:
-            status = row[14] if len(row) > 14 else 'Active'
-            if status == 'Closed':
-                closed_records.append(row)
+    store = as_store(records)
     
-    return closed_records
+    # Keep header
+    return [records[0]] + [store.rows[i] for i in store.positions(STATUS_CLOSED)]
 
 def search_records(query: str, search_field: str = 'all'):
     """
@@ -96,13 +88,40 @@ def search_records(query: str, search_field: str = 'all'):
     if not query:
         return records
     
+    store = as_store(records)
+    name_hindi, name_english = store.column('nameHindi'), store.column('nameEnglish')
+    ward, mobile, record_id = store.column('wardArea'), store.column('mobile'), store.column('recordId')
+    
     # Keep header
     results = [records[0]]
     
-    for row in records[1:]:
-        if len(row) < 4:
-            continue
-        
+    searchable = np.flatnonzero(store.row_width >= 4)
+    positions = searchable
+    
+    # A recordId or full mobile number is looked up directly, without a scan
+    key_fields = KEY_SEARCH_FIELDS.get(search_field)
+    matches = store.key_positions(query, key_fields, prefix=False) if key_fields else None
+    if matches is not None:
+        matches = np.intersect1d(matches, searchable, assume_unique=True)
+        if len(matches):
+            return results + [store.rows[i] for i in matches]
+    
+    # Only rows that contain every trigram of the query can match
+    if search_field in TEXT_INDEX_FIELDS:
+        candidates = store.text_candidates(search_field, query)
+        if candidates is not None:
+            positions = np.intersect1d(candidates, positions, assume_unique=True)
+    
+    # Leading digits of a mobile number also match numbers formatted with
+    # spaces or +91, on top of the rows that contain the digits as typed
+    key_hits = store.key_positions(query, key_fields) if key_fields else None
+    if key_hits is not None:
+        key_hits = np.intersect1d(key_hits, searchable, assume_unique=True)
+        positions = np.union1d(positions, key_hits)
+    key_hits = set() if key_hits is None else set(key_hits.tolist())
+    
+    for i in positions:
+        row = store.rows[i]
         match = False
         
         if search_field == 'all':
@@ -112,28 +131,28 @@ def search_records(query: str, search_field: str = 'all'):
         
         elif search_field == 'name':
             # Search in both Hindi and English names
-            name_hindi = row[2].lower() if len(row) > 2 else ''
-            name_english = row[3].lower() if len(row) > 3 else ''
-            match = query in name_hindi or query in name_english
+            match = query in name_hindi[i].lower() or query in name_english[i].lower()
         
         elif search_field == 'ward':
             # Search in ward/area
-            ward = row[6].lower() if len(row) > 6 else ''
-            match = query in ward
+            match = query in ward[i].lower()
         
         elif search_field == 'mobile':
             # Search in mobile number
-            mobile = row[7] if len(row) > 7 else ''
-            match = query in str(mobile)
+            match = query in mobile[i]
         
         elif search_field == 'recordId':
             # Search by record ID
-            record_id = row[0].lower() if len(row) > 0 else ''
-            match = query in record_id
+            match = query in record_id[i].lower()
         
-        if match:
+        if match or i in key_hits:
             results.append(row)
     
+    # No name contains the text: fall back to names that sound alike, in either script
+    if search_field == 'name' and len(results) == 1:
+        matches = np.intersect1d(store.phonetic_positions(query), searchable, assume_unique=True)
+        results.extend(store.rows[i] for i in matches)
+    
     return results
 
 def get_recent_records(limit: int = 10):
@@ -174,34 +193,40 @@ def validate_record_structure(record):
 def get_statistics():
     """
     Get quick statistics from records
+    Answered from the status partitions once the records are loaded; before
+    that, streams only the recordId and loanStatus columns instead of the whole sheet
     Returns: dict with basic stats
     """
-    records = load_records()
-    if not records or len(records) <= 1:
+    if get_version():
+        store = get_store()
+        counts = store.counts()
         return {
-            'total': 0,
-            'active': 0,
-            'closed': 0,
-            'has_data': False
+            'total': store.size,
+            'active': counts['active'],
+            'closed': counts['closed'] + counts['other'],
+            'has_data': store.size > 0
         }
     
-    total = len(records) - 1
+    total = 0
     active = 0
     closed = 0
     
-    for row in records[1:]:
-        if len(row) >= 15:
-            status = row[14] if len(row) > 14 else 'Active'
+    try:
+        for record_id, status in iter_records(['recordId', 'loanStatus']):
+            total += 1
             if status == 'Active':
                 active += 1
-            else:
+            elif status:
                 closed += 1
+    except Exception as e:
+        st.error(f"❌ Error loading records: {e}")
+        total = 0
     
     return {
         'total': total,
         'active': active,
         'closed': closed,
-        'has_data': True
+        'has_data': total > 0
     }
 
 def refresh_cache():
@@ -209,6 +234,8 @@ def refresh_cache():
     Force refresh of cached data
     This can be called when records are updated
     """
+    invalidate()
+    
     # Clear any Streamlit cache if needed
     if hasattr(st, 'cache_data'):
         st.cache_data.clear()
@@ -0,0 +1,130 @@
+"""
+Text Index - character-trigram inverted index for substring search
+Every text is split into overlapping 3-character grams (code points, so
+Devanagari and Latin are handled alike). A substring query can only occur
+in texts that contain all of its trigrams, so intersecting the posting lists
+yields a small candidate set that the caller verifies with a plain `in` check.
+
+The bulk of the index is built in one vectorized pass: characters are
+numbered, each trigram is packed into an integer and the (trigram, position)
+pairs are sorted into compressed posting lists. Texts added later go to a
+small per-trigram overflow that queries merge in.
+"""
+
+import threading
+from array import array
+import numpy as np
+
+# Stop intersecting once this few candidates are left; verifying is cheaper
+VERIFY_THRESHOLD = 64
+
+def trigrams(text: str) -> set:
+    """Distinct 3-character substrings of text (empty for texts shorter than 3)"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _build_postings(texts: list) -> tuple:
+    """(alphabet, sorted unique trigram codes, offsets into positions, positions)"""
+    if not texts:
+        return {}, np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+    # All texts in one buffer, separated by NUL so no trigram spans two texts
+    chars = np.frombuffer('\0'.join(texts).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    owner = np.repeat(np.arange(len(texts), dtype=np.int64), lengths + 1)[:len(chars)]
+
+    # Number the distinct characters so a trigram packs into a small integer
+    alphabet = np.unique(chars)
+    ids = np.searchsorted(alphabet, chars).astype(np.int64)
+    base = len(alphabet)
+
+    valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+    codes = ((ids[:-2] * base + ids[1:-1]) * base + ids[2:])[valid]
+    positions = owner[:-2][valid]
+
+    # Sort by (trigram, position): one value sort of packed keys when they fit in
+    # 63 bits, otherwise a stable argsort (positions already ascend along the buffer)
+    shift = max(1, len(texts).bit_length())
+    if (base ** 3) << shift < 1 << 63:
+        keys = np.sort((codes << shift) | positions)
+        codes, positions = keys >> shift, keys & ((1 << shift) - 1)
+    else:
+        order = np.argsort(codes, kind='stable')
+        codes, positions = codes[order], positions[order]
+
+    # Drop repeats of a trigram within a text
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+    codes, positions = codes[keep], positions[keep].astype(np.int32)
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    offsets = np.append(starts, len(codes)).astype(np.int64)
+    alphabet = {chr(code): i for i, code in enumerate(alphabet.tolist())}
+    return alphabet, codes[starts], offsets, positions
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to the positions of the texts containing it
+    Postings are only ever added: add() indexes new or changed texts without
+    removing old entries, so candidates are a superset of the true matches
+    and callers must verify them. Safe for one writer and many readers.
+    """
+
+    def __init__(self, texts: list = ()):
+        self._alphabet, self._grams, self._offsets, self._positions = _build_postings(list(texts))
+        self._overflow = {}
+        self._lock = threading.Lock()
+        self.size = len(texts)
+
+    def add(self, positions, texts):
+        """Index texts[j] under positions[j] (texts must already be normalized)"""
+        with self._lock:
+            overflow = self._overflow
+            for position, text in zip(positions, texts):
+                for gram in trigrams(text):
+                    entries = overflow.get(gram)
+                    if entries is None:
+                        entries = overflow[gram] = array('i')
+                    entries.append(position)
+                self.size = max(self.size, position + 1)
+
+    def _postings(self, gram: str):
+        postings = None
+        ids = [self._alphabet.get(char) for char in gram]
+        if None not in ids:
+            base = len(self._alphabet)
+            code = (ids[0] * base + ids[1]) * base + ids[2]
+            j = np.searchsorted(self._grams, code)
+            if j < len(self._grams) and self._grams[j] == code:
+                postings = self._positions[self._offsets[j]:self._offsets[j + 1]]
+
+        extra = self._overflow.get(gram)
+        if extra:
+            extra = np.array(extra, dtype=np.int32)
+            postings = np.unique(extra) if postings is None else np.union1d(postings, extra)
+        return postings
+
+    def candidates(self, query: str):
+        """
+        Positions of texts that may contain query (already normalized)
+        Returns: sorted int array, or None if the query is too short to use
+        the index (the caller has to scan)
+        """
+        grams = trigrams(query)
+        if not grams:
+            return None
+
+        lists = []
+        for gram in grams:
+            postings = self._postings(gram)
+            if postings is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(postings)
+
+        # Rarest trigrams first keeps the running intersection small
+        lists.sort(key=len)
+        result = lists[0]
+        for postings in lists[1:]:
+            if len(result) <= VERIFY_THRESHOLD:
+                break
+            result = np.intersect1d(result, postings, assume_unique=True)
+        return result
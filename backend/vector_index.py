@@ -0,0 +1,129 @@
+"""
+Vector Index - exact top-k cosine similarity over an in-memory matrix
+Record vectors are L2-normalized and kept in one contiguous float32 array,
+so a query is a single matrix-vector product plus an argpartition.
+"""
+
+import threading
+import numpy as np
+
+def normalize(vector):
+    """L2-normalize a vector (or each row of a matrix); zero vectors stay zero"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(vector, axis=-1, keepdims=True)
+    return np.divide(vector, norms, out=np.zeros_like(vector), where=norms > 0)
+
+def top_k_indices(scores, top_k: int):
+    """Indices of the top_k highest scores, best first"""
+    if top_k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index keyed by record id
+    Deleting a record moves the last row into its slot, so the live rows
+    are always matrix[:len(index)] with no holes.
+    """
+
+    def __init__(self, dim: int = None):
+        self.dim = dim
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._ids = []
+        self._positions = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, record_id):
+        return record_id in self._positions
+
+    @property
+    def ids(self) -> list:
+        return list(self._ids)
+
+    @property
+    def vectors(self):
+        """Normalized vectors of live rows, aligned with ids"""
+        return self._matrix[:len(self._ids)]
+
+    def _check_dim(self, vectors):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+    def _reserve(self, size: int):
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+
+        new_capacity = max(size, capacity * 2, 64)
+        grown = np.empty((new_capacity, self.dim), dtype=np.float32)
+        grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = grown
+
+    def add(self, record_ids: list, vectors):
+        """Add new records, or overwrite the vectors of ids already present"""
+        if not len(record_ids):
+            return
+
+        vectors = normalize(np.atleast_2d(vectors))
+        with self._lock:
+            self._check_dim(vectors)
+
+            new_ids = [record_id for record_id in record_ids if record_id not in self._positions]
+            self._reserve(len(self._ids) + len(new_ids))
+
+            for record_id, vector in zip(record_ids, vectors):
+                position = self._positions.get(record_id)
+                if position is None:
+                    position = len(self._ids)
+                    self._positions[record_id] = position
+                    self._ids.append(record_id)
+                self._matrix[position] = vector
+
+    def update(self, record_id, vector):
+        """Replace the vector of an existing record"""
+        if record_id not in self._positions:
+            raise KeyError(record_id)
+        self.add([record_id], vector)
+
+    def delete(self, record_id):
+        """Remove a record; unknown ids are ignored"""
+        with self._lock:
+            position = self._positions.pop(record_id, None)
+            if position is None:
+                return
+
+            last = len(self._ids) - 1
+            if position != last:
+                moved_id = self._ids[last]
+                self._matrix[position] = self._matrix[last]
+                self._ids[position] = moved_id
+                self._positions[moved_id] = position
+            self._ids.pop()
+
+    def search(self, query_vector, top_k: int = 5) -> list:
+        """
+        Find the most similar records
+        Returns: list of (record_id, cosine similarity), best first
+        """
+        query = normalize(query_vector)
+        with self._lock:
+            if not self._ids:
+                return []
+            if query.shape[-1] != self.dim:
+                raise ValueError(f"Expected query of dimension {self.dim}, got {query.shape[-1]}")
+
+            scores = self.vectors @ query
+            best = top_k_indices(scores, top_k)
+            return [(self._ids[i], float(scores[i])) for i in best]
@@ -0,0 +1,175 @@
+"""
+Write Queue - durable write-behind journal for new records
+Saving a record only writes it to a local SQLite journal and returns at once.
+A background worker appends pending rows to Google Sheets in batches and
+removes them from the journal only after Sheets accepted them, so queued
+records survive crashes and restarts.
+
+An append can fail after Sheets applied it (a timeout, or a crash before the
+journal delete). Before its batch is appended, each entry records how many
+sheet rows already existed, so before the next flush the sheet rows below
+that point are read and entries whose row is already there are dropped
+instead of being appended a second time.
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from backend.config import WRITE_QUEUE_PATH, WRITE_QUEUE_BATCH_SIZE, WRITE_QUEUE_FLUSH_SECONDS
+from backend.sheets import HEADERS, build_record_row, append_rows, iter_records
+from backend.replica import get_row_count
+
+MAX_BACKOFF_SECONDS = 300
+
+# loanStatus is edited in place once the record is in the sheet, so it is left
+# out when telling whether a queued row was already written
+_STATUS_COLUMN = HEADERS.index('loanStatus')
+
+logger = logging.getLogger(__name__)
+
+_db_lock = threading.Lock()
+_worker_lock = threading.Lock()
+_worker = None
+_wake = threading.Event()
+_status = {'last_error': None, 'last_flush': None, 'failures': 0}
+
+def _connect():
+    directory = os.path.dirname(WRITE_QUEUE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(WRITE_QUEUE_PATH, timeout=30)
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pending ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, record_id TEXT NOT NULL, "
+        "row TEXT NOT NULL, created_at REAL NOT NULL, sent_after INTEGER)"
+    )
+    return conn
+
+def _execute(sql: str, params=()):
+    with _db_lock:
+        conn = _connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+def enqueue_record(record_data: dict) -> str:
+    """
+    Journal a new record for upload and return immediately
+    Returns: the generated recordId
+    Raises: sqlite3.Error if the journal cannot be written
+    """
+    row = build_record_row(record_data)
+    _execute(
+        "INSERT INTO pending (record_id, row, created_at) VALUES (?, ?, ?)",
+        (row[0], json.dumps(row, ensure_ascii=False), time.time())
+    )
+    _ensure_worker()
+    _wake.set()
+    return row[0]
+
+def get_queue_status() -> dict:
+    """
+    Returns: dict with pending (queue depth), last_error, last_flush (epoch seconds)
+    and failures (consecutive failed flushes)
+    """
+    pending = _execute("SELECT COUNT(*) FROM pending")[0][0]
+    return {'pending': pending, **_status}
+
+def flush(limit: int = WRITE_QUEUE_BATCH_SIZE) -> int:
+    """
+    Append up to `limit` pending rows to the sheet in one call
+    Returns: number of rows written
+    Raises: on Sheets errors (the rows stay queued, marked as sent)
+    """
+    entries = _execute("SELECT id, row FROM pending ORDER BY id LIMIT ?", (limit,))
+    if not entries:
+        return 0
+
+    # sent_after: sheet rows (including header) known to exist before the first
+    # attempt, so the rows it may have written all lie below that point
+    ids = [entry_id for entry_id, _ in entries]
+    placeholders = ','.join('?' * len(ids))
+    _execute(
+        f"UPDATE pending SET sent_after = ? WHERE id IN ({placeholders}) AND sent_after IS NULL",
+        [get_row_count(), *ids]
+    )
+
+    append_rows([json.loads(row) for _, row in entries])
+
+    _execute(f"DELETE FROM pending WHERE id IN ({placeholders})", ids)
+    return len(ids)
+
+def _row_content(row: list) -> tuple:
+    """Cells compared between a queued row and the sheet (as the sheet returns them)"""
+    cells = [str(cell).strip() for cell in row] + [''] * (len(HEADERS) - len(row))
+    del cells[_STATUS_COLUMN]
+    return tuple(cells[:len(HEADERS) - 1])
+
+def _drop_already_written():
+    """
+    Drop sent entries whose row is already in the sheet, so an append that
+    failed after Sheets applied it is not uploaded twice. Only the sheet rows
+    added since the earliest attempt are read. A sheet row accounts for at most
+    one entry, and entries never sent are left alone, so a new record that
+    merely shares a recordId with a written one is kept.
+    """
+    entries = _execute("SELECT id, record_id, row, sent_after FROM pending WHERE sent_after IS NOT NULL ORDER BY id")
+    if not entries:
+        return
+
+    start_row = max(2, min(sent_after for *_, sent_after in entries) + 1)
+    written = Counter(_row_content(row) for row in iter_records(start_row=start_row))
+    dropped = []
+    for entry_id, record_id, row, _ in entries:
+        content = _row_content(json.loads(row))
+        if written[content]:
+            written[content] -= 1
+            dropped.append(entry_id)
+            logger.warning("Write queue: entry %s (recordId %s) is already in the sheet, dropping it", entry_id, record_id)
+
+    if dropped:
+        _execute(f"DELETE FROM pending WHERE id IN ({','.join('?' * len(dropped))})", dropped)
+
+def _run():
+    # Leftovers from a previous run are uploaded right away
+    delay = 0
+
+    while True:
+        _wake.wait(timeout=delay)
+        _wake.clear()
+
+        try:
+            # Sent entries only remain after a failed flush or a crash
+            _drop_already_written()
+
+            while flush() == WRITE_QUEUE_BATCH_SIZE:
+                pass
+
+            _status.update(last_error=None, last_flush=time.time(), failures=0)
+            delay = WRITE_QUEUE_FLUSH_SECONDS
+        except Exception as e:
+            _status['last_error'] = str(e)
+            _status['failures'] += 1
+            delay = min(MAX_BACKOFF_SECONDS, WRITE_QUEUE_FLUSH_SECONDS * 2 ** _status['failures'])
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="sheets-write-queue", daemon=True)
+            _worker.start()
+
+def start():
+    """
+    Start the background worker (uploads anything left over from a previous run)
+    Safe to call on every rerun: a running worker is left to its backoff.
+    """
+    _ensure_worker()
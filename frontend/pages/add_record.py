@@ -1,6 +1,6 @@
 import streamlit as st
 from backend.llm import call_gemini, EXTRACTION_PROMPT
-from backend.sheets import append_record_to_sheet
+from backend.write_queue import enqueue_record, get_queue_status
 from backend.utils import DEFAULT_FIELDS, validate_and_format_date
 
 @st.fragment
@@ -38,10 +38,16 @@ def render():
     
     # Show success message if it exists
     if "save_success" in st.session_state and st.session_state["save_success"]:
-        st.success("✅ Record saved successfully !")
+        st.success(f"✅ Record saved successfully ! (ID: {st.session_state['save_success']})")
         st.info("🔄 You can now add another record")
         del st.session_state["save_success"]
     
+    queue_status = get_queue_status()
+    if queue_status['pending']:
+        st.caption(f"📤 {queue_status['pending']} record(s) waiting to be uploaded to Google Sheets")
+        if queue_status['last_error']:
+            st.warning(f"⚠️ Upload is retrying: {queue_status['last_error']}")
+    
     # Extraction section as fragment
     extraction_section()
     
@@ -116,17 +122,19 @@ def render():
                         st.warning(f"⚠️ Date reformatted to: {formatted_date}")
                         edited['date'] = formatted_date
                 
-                with st.spinner("Saving to Google Sheets..."):
-                    success = append_record_to_sheet(edited)
+                # Journaled locally and uploaded in the background
+                try:
+                    record_id = enqueue_record(edited)
+                except Exception as e:
+                    record_id = None
+                    st.error(f"❌ Failed to save record. Please try again. ({e})")
                 
-                if success:
-                    st.session_state["save_success"] = True
+                if record_id:
+                    st.session_state["save_success"] = record_id
                     del st.session_state["record_data"]
                     if "text_input_area" in st.session_state:
                         del st.session_state["text_input_area"]
                     st.rerun()
-                else:
-                    st.error("❌ Failed to save record. Please try again.")
             
             if cancel:
                 del st.session_state["record_data"]
@@ -1,5 +1,5 @@
 import streamlit as st
-from backend.sheets import update_loan_status
+from backend.sheets import update_loan_status, update_loan_statuses
 
 @st.fragment
 def close_loan_fragment(row_number: int, record_id: str):
@@ -32,6 +32,43 @@ def close_loan_fragment(row_number: int, record_id: str):
     if st.button("🔴 Close This Loan", key=f"close_{row_number}", type="secondary", use_container_width=True):
         confirm_close_dialog()
 
+def close_selected_section(results: list):
+    active = [r for r in results if r.get('loanStatus', 'Active') == 'Active']
+    if len(active) < 2:
+        return
+    
+    labels = {
+        r['row_number']: f"{r.get('recordId', 'N/A')} — {r.get('nameHindi', 'N/A')} / {r.get('nameEnglish', 'N/A')}"
+        for r in active
+    }
+    
+    with st.expander("🔴 Close multiple loans"):
+        selected = st.multiselect(
+            "Select loans to close",
+            options=list(labels.keys()),
+            format_func=lambda row_number: labels[row_number],
+            key="close_selected_rows"
+        )
+        
+        confirmed = st.checkbox(f"I confirm closing {len(selected)} loan(s)", key="close_selected_confirm")
+        
+        if st.button("🔴 Close Selected", type="primary", disabled=not (selected and confirmed), use_container_width=True):
+            with st.spinner("Closing loans..."):
+                outcome = update_loan_statuses([(row_number, "Closed") for row_number in selected])
+            
+            failed = [r for r in outcome if not r['success']]
+            closed = len(outcome) - len(failed)
+            
+            if closed:
+                st.success(f"✅ {closed} loan(s) closed successfully!")
+            for r in failed:
+                st.error(f"❌ {labels.get(r['key'], r['key'])}: {r['error']}")
+            
+            if not failed:
+                for key in ("current_search_results", "close_selected_rows", "close_selected_confirm"):
+                    st.session_state.pop(key, None)
+                st.rerun()
+
 def display_record(result: dict, idx: int):
     name_display = f"{result.get('nameHindi', 'N/A')} / {result.get('nameEnglish', 'N/A')}"
     record_id = result.get('recordId', 'N/A')
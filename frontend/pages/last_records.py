@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from backend.sheets import read_all_records
+from backend.replica import get_records, invalidate
 
 def render():
     st.title("📚 Last 10 Records")
@@ -8,9 +8,10 @@ def render():
     col1, col2 = st.columns([3, 1])
     with col2:
         if st.button("🔄 Refresh", use_container_width=True):
+            invalidate()
             st.rerun()
     
-    records = read_all_records()
+    records = get_records()
     
     if records:
         if len(records) > 1:
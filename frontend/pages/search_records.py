@@ -1,7 +1,10 @@
 import streamlit as st
-from backend.sheets import read_all_records
-from backend.search import basic_search, semantic_search, ai_deep_search
-from .components import display_record
+from backend.replica import get_records
+from backend.search import (
+    basic_search, semantic_search, hybrid_search, ai_deep_search, get_ann_recall, resolve_semantic_backend
+)
+from backend.config import ANN_NPROBE, DEEP_SEARCH_SHORTLIST, DEEP_SEARCH_FULL_SCAN_FALLBACK
+from .components import display_record, close_selected_section
 
 def render():
     st.title("🔍 Smart Record Search")
@@ -9,24 +12,65 @@ def render():
     
     search_query = st.text_input("🔎 Enter search query:", placeholder="e.g., राज कुमार, Raj Kumar, 9876543210, पटना")
     
-    col1, col2, col3 = st.columns(3)
+    with st.expander("⚙️ Search settings"):
+        default_backend = resolve_semantic_backend()
+        engine = st.radio(
+            "Smart Search engine",
+            ["Gemini embeddings (online)", "Local n-grams (offline)"],
+            index=0 if default_backend == 'gemini' else 1,
+            horizontal=True,
+            help="The local engine compares spelling fragments of names and addresses. It needs no network or API quota."
+        )
+        semantic_backend = resolve_semantic_backend('local' if engine.startswith("Local") else 'gemini')
+        if engine.startswith("Gemini") and semantic_backend == 'local':
+            st.caption("No Gemini API key configured, Smart Search runs locally.")
+        
+        index_mode = st.radio(
+            "Smart Search index",
+            ["Exact", "Approximate (large ledgers)"],
+            horizontal=True,
+            help="Approximate search scans only the closest clusters of records. Faster on very large ledgers, may miss a few matches."
+        )
+        semantic_mode = 'ann' if index_mode.startswith("Approximate") else 'exact'
+        nprobe = ANN_NPROBE
+        if semantic_mode == 'ann':
+            nprobe = st.slider("Clusters to scan (higher = better recall, slower)", 1, 64, ANN_NPROBE)
+        
+        shortlist_size = st.number_input(
+            "Deep Search: records sent to AI (0 = all)",
+            min_value=0, value=DEEP_SEARCH_SHORTLIST, step=50,
+            help="Records are first ranked locally; only the closest ones are checked by the AI."
+        )
+        full_scan_fallback = st.checkbox(
+            "Deep Search: check all records if the shortlist has no match",
+            value=DEEP_SEARCH_FULL_SCAN_FALLBACK
+        )
+    
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         basic_search_btn = st.button("⚡ Quick Search (Fast)", use_container_width=True)
     with col2:
         semantic_search_btn = st.button("🧠 Smart Search", use_container_width=True)
     with col3:
+        hybrid_search_btn = st.button(
+            "🎯 Best Match", use_container_width=True,
+            help="Combines exact word matches with Smart Search similarity in one ranked list."
+        )
+    with col4:
         deep_search_btn = st.button("🔬 Deep Search (Thorough)", use_container_width=True)
     
-    if basic_search_btn or semantic_search_btn or deep_search_btn:
+    search_clicked = basic_search_btn or semantic_search_btn or hybrid_search_btn or deep_search_btn
+    
+    if search_clicked:
         keys_to_delete = [key for key in st.session_state.keys() if key.startswith('confirm_close_')]
         for key in keys_to_delete:
             del st.session_state[key]
         if 'current_search_results' in st.session_state:
             del st.session_state['current_search_results']
     
-    if search_query.strip() and (basic_search_btn or semantic_search_btn or deep_search_btn):
-        records = read_all_records()
+    if search_query.strip() and search_clicked:
+        records = get_records()
         
         if not records or len(records) < 2:
             st.warning("⚠️ No records found in database.")
@@ -38,16 +82,33 @@ def render():
                     results = basic_search(records, search_query)
                 
             elif semantic_search_btn:
-                results = semantic_search(records, search_query, top_k=5)
+                results = semantic_search(
+                    records, search_query, top_k=5, mode=semantic_mode, nprobe=nprobe, backend=semantic_backend
+                )
+                
+                if semantic_mode == 'ann':
+                    recall = get_ann_recall(nprobe, backend=semantic_backend)
+                    if recall is not None:
+                        st.caption(f"📐 Approximate index recall@10 vs exact search: {recall:.0%} (clusters scanned: {nprobe})")
+                
+            elif hybrid_search_btn:
+                results = hybrid_search(
+                    records, search_query, top_k=10, mode=semantic_mode, nprobe=nprobe, backend=semantic_backend
+                )
                 
             elif deep_search_btn:
                 with st.spinner("Processing..."):
-                    results = ai_deep_search(records, search_query, batch_size=20)
+                    results = ai_deep_search(
+                        records, search_query, batch_size=20,
+                        shortlist_size=int(shortlist_size), full_scan_fallback=full_scan_fallback
+                    )
             
             if results:
                 st.success(f"✅ Found {len(results)} matching record(s)")
                 st.session_state['current_search_results'] = results
                 
+                close_selected_section(results)
+                
                 for idx, result in enumerate(results, 1):
                     display_record(result, idx)
                 
@@ -58,12 +119,14 @@ def render():
                 
                 if basic_search_btn:
                     st.info("💡 Try using **Smart Search** or **Deep Search** for better results.")
-                elif semantic_search_btn:
+                elif semantic_search_btn or hybrid_search_btn:
                     st.info("💡 Try **Deep Search** for a more thorough AI-powered search.")
     
     elif 'current_search_results' in st.session_state and st.session_state['current_search_results']:
         results = st.session_state['current_search_results']
         st.success(f"✅ Found {len(results)} matching record(s)")
         
+        close_selected_section(results)
+        
         for idx, result in enumerate(results, 1):
             display_record(result, idx)
\ No newline at end of file
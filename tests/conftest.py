@@ -0,0 +1,28 @@
+"""Shared fixtures: every test runs against the in-process fake of the Sheets API"""
+
+import os
+
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+import pytest
+from backend import replica, sheets, sheets_scheduler
+from backend.fake_sheets import FakeSpreadsheets, generate_ledger
+from backend.rate_limit import TokenBucket
+
+@pytest.fixture(autouse=True)
+def unthrottled_sheets(monkeypatch):
+    """The fake has no quota, so the client-side Sheets quotas would only slow tests down"""
+    monkeypatch.setattr(sheets_scheduler, "_buckets", {
+        quota: TokenBucket.per_minute(1e9, burst=1e6) for quota in ('read', 'write')
+    })
+
+@pytest.fixture
+def fake_sheet(monkeypatch):
+    """A fresh fake spreadsheet of 500 records; the replica reloads it on the next read"""
+    fake = FakeSpreadsheets(generate_ledger(500, seed=7))
+    monkeypatch.setattr(sheets, "_spreadsheets", fake)
+    monkeypatch.setattr(sheets, "_header_present", False)
+    monkeypatch.setattr(replica, "_rows", None)
+    monkeypatch.setattr(replica, "_digest", None)
+    monkeypatch.setattr(replica, "_stale", True)
+    return fake
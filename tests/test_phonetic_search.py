@@ -0,0 +1,34 @@
+"""Phonetic name matching and its Quick Search fallback"""
+
+import os
+
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+import pytest
+from backend.fake_sheets import generate_ledger
+from backend.phonetic import phonetic_key, looks_like_name
+from backend.search import basic_search, phonetic_search
+
+@pytest.fixture(scope="module")
+def rows():
+    return generate_ledger(3000, seed=1)
+
+@pytest.mark.parametrize("spelling", ["Ram Lal", "Ramlal", "Raam Laal", "रामलाल"])
+def test_spellings_share_the_key_of_the_devanagari_name(spelling):
+    assert phonetic_key(spelling) == phonetic_key("राम लाल")
+
+@pytest.mark.parametrize("query", ["राम लाल", "Ramlal"])
+def test_quick_search_falls_back_to_names_that_sound_alike(rows, query):
+    results = basic_search(rows, query)
+    assert results
+    assert {record.nameHindi for record in results} == {"राम लाल"}
+    assert all(record.loanStatus != "Closed" for record in results)
+
+def test_phonetic_search_matches_across_scripts(rows):
+    assert phonetic_search(rows, "राम लाल") == phonetic_search(rows, "Ramlal")
+
+@pytest.mark.parametrize("query", ["Ram_16092020_0002", "Ram_1609", "Ram 1609"])
+def test_identifiers_never_fall_back_to_phonetic_matches(rows, query):
+    assert not looks_like_name(query)
+    assert phonetic_search(rows, query) == []
+    assert basic_search(rows, query) == []
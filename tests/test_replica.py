@@ -0,0 +1,121 @@
+"""Incremental replica syncs and the RecordStore that follows them"""
+
+import numpy as np
+from backend import replica, sheets
+from backend.record_store import RecordStore, SEARCH_TEXT_FIELDS, TEXT_INDEX_FIELDS, get_store
+
+def _sync(full: bool = False):
+    if full:
+        replica._full_loaded_at = float("-inf")
+    replica.invalidate()
+    return replica.get_snapshot()
+
+def _warm(store):
+    """Build everything _derive has to carry over"""
+    store.records(range(store.size))
+    for name in SEARCH_TEXT_FIELDS:
+        store.search_text(name)
+    for name in TEXT_INDEX_FIELDS:
+        store.text_index(name)
+        store.bm25_index(name)
+    store.key_index('mobile')
+    store.key_index('recordId')
+    store.phonetic_index()
+
+def _assert_same(derived, fresh):
+    assert derived.size == fresh.size
+    assert derived.rows == fresh.rows
+    assert derived.text == fresh.text
+    for name in ('row_numbers', 'row_width', 'amount', 'interest', 'rate', 'date_ordinal', 'status', 'open_positions'):
+        np.testing.assert_array_equal(getattr(derived, name), getattr(fresh, name))
+    for code, positions in fresh.partitions.items():
+        np.testing.assert_array_equal(derived.partitions[code], positions)
+
+    assert derived.records(range(derived.size)) == fresh.records(range(fresh.size))
+    for name in SEARCH_TEXT_FIELDS:
+        assert derived.search_text(name) == fresh.search_text(name)
+
+    for name in ('quick', 'all'):
+        texts = fresh.search_text(name)
+        for query in ('ram', 'ward 1', 'closed', 'active', 'पटना'):
+            candidates = derived.text_candidates(name, query)
+            found = [i for i in candidates.tolist() if query in texts[i]]
+            assert found == [i for i in range(fresh.size) if query in texts[i]]
+            np.testing.assert_allclose(derived.bm25_index(name).scores(query), fresh.bm25_index(name).scores(query), rtol=1e-5)
+
+    for query in fresh.column('mobile')[-3:] + fresh.column('recordId')[-3:] + ['98765']:
+        np.testing.assert_array_equal(derived.key_positions(query), fresh.key_positions(query))
+    for query in ('Ramlal', 'राम', 'Sita Devi'):
+        np.testing.assert_array_equal(derived.phonetic_positions(query), fresh.phonetic_positions(query))
+
+def test_unchanged_full_sync_keeps_rows_and_store(fake_sheet):
+    rows, version = _sync()
+    store = get_store()
+
+    assert _sync(full=True) == (rows, version)
+    assert replica.get_records() is rows
+    assert get_store() is store
+
+def test_full_sync_after_status_write_keeps_store(fake_sheet):
+    rows, _ = _sync()
+    status = 'Closed' if rows[1][replica.STATUS_COLUMN] != 'Closed' else 'Active'
+    sheets.update_loan_status(2, status)
+    store = get_store()
+    assert store.rows[0][replica.STATUS_COLUMN] == status
+
+    _sync(full=True)
+
+    assert get_store() is store
+
+def _flipped(status: str) -> str:
+    return 'Active' if status == 'Closed' else 'Closed'
+
+def test_status_writes_are_applied_without_a_read(fake_sheet):
+    rows, version = _sync()
+    reads = fake_sheet.stats['read']
+    statuses = [_flipped(rows[2][14]), _flipped(rows[3][14])]
+
+    sheets.update_loan_status(3, statuses[0])
+    sheets.update_loan_status(4, statuses[1])
+
+    new_rows, new_version = replica.get_snapshot()
+    assert fake_sheet.stats['read'] == reads
+    assert new_version > version
+    assert [new_rows[2][14], new_rows[3][14]] == statuses
+    # The previous snapshot is never modified
+    assert [rows[2][14], rows[3][14]] == [_flipped(status) for status in statuses]
+
+def test_delta_sync_picks_up_appends_and_outside_status_edits(fake_sheet):
+    _sync()
+    fake_sheet.rows[10][14] = _flipped(fake_sheet.rows[10][14])
+    new_row = sheets.build_record_row({'nameEnglish': 'Ramesh Lal', 'nameHindi': 'रमेश लाल', 'date': '01/02/2024'})
+    sheets.append_rows([new_row])
+
+    rows, _ = replica.get_snapshot()
+
+    assert rows == [list(row) for row in fake_sheet.rows]
+
+def test_derived_store_matches_a_fresh_build(fake_sheet):
+    _sync()
+    store = get_store()
+    _warm(store)
+
+    # An appended row without a loanStatus cell, then status writes from this
+    # app (write-through), then an outside edit plus another append (delta sync)
+    sheets.append_rows([sheets.build_record_row({'nameEnglish': 'Ram Lal', 'nameHindi': 'राम लाल', 'date': '01/02/2024'})[:14]])
+    rows, _ = _sync()
+    sheets.update_loan_status(len(rows), 'Closed')
+    sheets.update_loan_status(2, _flipped(fake_sheet.rows[1][14]))
+    sheets.update_loan_status(5, _flipped(fake_sheet.rows[4][14]))
+    fake_sheet.rows[20][14] = _flipped(fake_sheet.rows[20][14])
+    sheets.append_rows([
+        sheets.build_record_row({'nameEnglish': 'Sita Devi', 'nameHindi': 'सीता देवी', 'mobile': '9876500001', 'date': '02/02/2024'}),
+    ])
+    rows, _ = _sync()
+
+    derived = get_store()
+    assert derived is not store and derived.source is rows
+    # Derived from the warm store rather than rebuilt
+    assert derived._text_indexes['all'] is store._text_indexes['all']
+
+    _assert_same(derived, RecordStore(rows))
@@ -0,0 +1,71 @@
+"""Sheets scheduler: identical reads in flight share one request"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend import sheets, sheets_scheduler
+
+class _BlockingRequest:
+    """Request whose execute() waits until released, counting the calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        return self
+
+    def execute(self):
+        self.calls += 1
+        self.release.wait(5)
+        return {'values': [['call', self.calls]]}
+
+class _Done:
+    def execute(self):
+        return {}
+
+def _wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("timed out waiting")
+
+def test_concurrent_identical_reads_share_one_request():
+    request = _BlockingRequest()
+    coalesced = sheets_scheduler.stats['coalesced']
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(sheets_scheduler.execute, request, 'read', ('test', 'same')) for _ in range(4)]
+        _wait_for(lambda: sheets_scheduler.stats['coalesced'] - coalesced == 3)
+        request.release.set()
+        results = [future.result() for future in futures]
+
+    assert request.calls == 1
+    assert all(result is results[0] for result in results)
+
+def test_read_after_a_write_does_not_join_an_earlier_read():
+    before, after = _BlockingRequest(), _BlockingRequest()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(sheets_scheduler.execute, before, 'read', ('test', 'write'))
+        _wait_for(lambda: before.calls == 1)
+        sheets_scheduler.execute(lambda: _Done(), 'write', idempotent=False)
+        second = executor.submit(sheets_scheduler.execute, after, 'read', ('test', 'write'))
+        after.release.set()
+        _wait_for(lambda: after.calls == 1)
+        before.release.set()
+        first.result(), second.result()
+
+    assert (before.calls, after.calls) == (1, 1)
+
+def test_concurrent_full_reads_of_the_fake_sheet_are_coalesced(fake_sheet):
+    fake_sheet.latency = 0.2
+    sheets.fetch_all_rows()
+    fake_sheet.reset_stats()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: sheets.fetch_all_rows(), range(4)))
+
+    assert fake_sheet.stats['read'] == 1
+    assert all(rows == results[0] for rows in results)
@@ -0,0 +1,96 @@
+"""Write-behind journal: uploads, and no duplicates after ambiguous failures or restarts"""
+
+import pytest
+from backend import replica, sheets, utils, write_queue
+
+@pytest.fixture
+def journal(fake_sheet, tmp_path, monkeypatch):
+    monkeypatch.setattr(write_queue, "WRITE_QUEUE_PATH", str(tmp_path / "queue.sqlite3"))
+    monkeypatch.setattr(write_queue, "_ensure_worker", lambda: None)
+    return fake_sheet
+
+def _record(name: str, amount: str = '5000') -> dict:
+    return {'nameEnglish': name, 'date': '16/09/2020', 'amount': amount}
+
+def _sheet_ids(fake) -> list:
+    return [row[0] for row in fake.rows[1:]]
+
+def _applied_then_timed_out(monkeypatch):
+    """append_rows that reaches the sheet but reports a timeout"""
+    def append(rows):
+        sheets.append_rows(rows)
+        raise TimeoutError("timed out")
+    monkeypatch.setattr(write_queue, "append_rows", append)
+
+def test_flush_uploads_in_order_and_empties_the_journal(journal):
+    ids = [write_queue.enqueue_record(_record(name)) for name in ('Ram', 'Sita', 'Mohan')]
+    assert write_queue.get_queue_status()['pending'] == 3
+
+    assert write_queue.flush() == 3
+
+    assert _sheet_ids(journal)[-3:] == ids
+    assert write_queue.get_queue_status()['pending'] == 0
+
+def test_failed_flush_keeps_rows_queued(journal, monkeypatch):
+    def append(rows):
+        raise TimeoutError("timed out")
+    monkeypatch.setattr(write_queue, "append_rows", append)
+    record_id = write_queue.enqueue_record(_record('Ram'))
+
+    with pytest.raises(TimeoutError):
+        write_queue.flush()
+
+    assert write_queue.get_queue_status()['pending'] == 1
+    assert record_id not in _sheet_ids(journal)
+
+def test_append_applied_before_a_timeout_is_not_repeated(journal, monkeypatch):
+    replica.get_snapshot()
+    _applied_then_timed_out(monkeypatch)
+    record_id = write_queue.enqueue_record(_record('Ram'))
+    with pytest.raises(TimeoutError):
+        write_queue.flush()
+    monkeypatch.setattr(write_queue, "append_rows", sheets.append_rows)
+
+    # What the worker does before its next attempt
+    write_queue._drop_already_written()
+    write_queue.flush()
+
+    assert _sheet_ids(journal).count(record_id) == 1
+    assert write_queue.get_queue_status()['pending'] == 0
+
+def test_restart_drops_rows_already_written(journal, monkeypatch):
+    _applied_then_timed_out(monkeypatch)
+    record_id = write_queue.enqueue_record(_record('Ram'))
+    with pytest.raises(TimeoutError):
+        write_queue.flush()
+
+    # A new process: same journal, nothing loaded yet
+    monkeypatch.setattr(write_queue, "append_rows", sheets.append_rows)
+    monkeypatch.setattr(replica, "_rows", None)
+    write_queue._drop_already_written()
+    write_queue.flush()
+
+    assert _sheet_ids(journal).count(record_id) == 1
+
+def test_unsent_record_sharing_a_record_id_is_kept(journal, monkeypatch):
+    replica.get_snapshot()
+    _applied_then_timed_out(monkeypatch)
+    record_id = write_queue.enqueue_record(_record('Ram'))
+    with pytest.raises(TimeoutError):
+        write_queue.flush()
+    monkeypatch.setattr(write_queue, "append_rows", sheets.append_rows)
+
+    # Same name and date, and the random suffix collides
+    monkeypatch.setattr(utils, "generate_record_id", lambda name, date: record_id)
+    write_queue.enqueue_record(_record('Ram', amount='7000'))
+
+    write_queue._drop_already_written()
+    write_queue.flush()
+
+    written = [row for row in journal.rows if row[0] == record_id]
+    assert [row[10] for row in written] == ['5000', '7000']
+
+def test_start_does_not_wake_a_running_worker(journal, monkeypatch):
+    write_queue._wake.clear()
+    write_queue.start()
+    assert not write_queue._wake.is_set()